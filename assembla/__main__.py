@@ -0,0 +1,81 @@
+"""
+Command line tools for the Assembla API wrapper.
+
+    python -m assembla export --key KEY --secret SECRET --output backups/
+
+The key and secret can also be provided by the ASSEMBLA_KEY and
+ASSEMBLA_SECRET environment variables.
+"""
+import os
+import sys
+import argparse
+from assembla import API
+from assembla.export import RESOURCES, COMPRESSIONS, export_space
+
+
+def export(args):
+    api = API(key=args.key, secret=args.secret)
+    api.page_workers = args.page_workers
+
+    spaces = api.spaces()
+    if args.space:
+        spaces = [
+            space for space in spaces
+            if space['id'] in args.space or space.get('wiki_name') in args.space or space.get('name') in args.space
+        ]
+        if not spaces:
+            raise SystemExit('No spaces matched {0}'.format(', '.join(args.space)))
+
+    for space in spaces:
+        directory = os.path.join(args.output, space.get('wiki_name') or space['id'])
+        counts = export_space(
+            space,
+            directory,
+            compression=args.compression,
+            resources=args.resources,
+            resume=not args.restart,
+        )
+        print '{0}: {1}'.format(
+            directory,
+            ', '.join(
+                '{0} {1}'.format('no' if counts[resource] is None else counts[resource], resource)
+                for resource in sorted(counts)
+            ),
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m assembla')
+    subparsers = parser.add_subparsers()
+
+    export_parser = subparsers.add_parser(
+        'export',
+        help='Stream the contents of spaces to newline delimited JSON files',
+    )
+    export_parser.add_argument('--key', default=os.environ.get('ASSEMBLA_KEY'))
+    export_parser.add_argument('--secret', default=os.environ.get('ASSEMBLA_SECRET'))
+    export_parser.add_argument(
+        '--space', action='append',
+        help='The id, wiki name or name of a space to export. Defaults to every space',
+    )
+    export_parser.add_argument('--output', default='.', help='The directory to write to')
+    export_parser.add_argument(
+        '--compression', choices=[compression for compression in COMPRESSIONS if compression],
+    )
+    export_parser.add_argument(
+        '--resources', nargs='+', choices=sorted(RESOURCES),
+        help='The resources to export. Defaults to all of them',
+    )
+    export_parser.add_argument('--page-workers', type=int, default=1)
+    export_parser.add_argument(
+        '--restart', action='store_true',
+        help='Start again, rather than resuming an interrupted export',
+    )
+    export_parser.set_defaults(command=export)
+
+    args = parser.parse_args(argv)
+    args.command(args)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,869 @@
+"""
+An asyncio flavour of the Assembla API wrapper, for Python 3.6+.
+
+Requires aiohttp (`pip install assembla[async]`). The models mirror those in
+`assembla.api`, but any method which talks to Assembla is a coroutine, and
+paginated endpoints can be consumed with `async for`:
+
+    async with AsyncAPI(key=..., secret=...) as assembla:
+        for space in await assembla.spaces():
+            async for ticket in space.iter_tickets():
+                ...
+"""
+import time
+import asyncio
+import hashlib
+from functools import wraps
+from urllib.parse import urlencode
+
+import aiohttp
+
+from assembla import api, settings
+from assembla.cache import LRUCache
+from assembla.lib import BulkResult
+from assembla.serializers import get_serializer
+from assembla.sync import TicketStore
+
+
+def assembla_filter(func):
+    """
+    The coroutine equivalent of `assembla.lib.assembla_filter`
+    """
+    @wraps(func)
+    async def wrapper(class_instance, **kwargs):
+
+        # Get the result
+        extra_params = kwargs.pop('extra_params', None)
+        results = await func(class_instance, extra_params)
+
+        # Filter the result
+        if kwargs:
+            results = [
+                obj for obj in results
+                if all(obj.get(attr_name) == value for attr_name, value in kwargs.items())
+            ]
+
+        return results
+    return wrapper
+
+
+class AsyncAPI(object):
+    cache_responses = False
+    # The number of pages to fetch concurrently once a paginated
+    # request has shown that more than one page of results exists
+    page_workers = 1
+
+    def __init__(self, key=None, secret=None, connection_limit=100, cache=None, serializer=None):
+        """
+        :key,
+        :secret
+            Your Assembla API access details, available from
+            https://www.assembla.com/user/edit/manage_clients
+        :connection_limit
+            The maximum number of simultaneous connections to Assembla
+        :cache
+            An optional instance of a cache backend from `assembla.cache`,
+            used when `cache_responses` is True. Defaults to an LRUCache
+        :serializer
+            An optional serializer from `assembla.serializers`, used to decode
+            responses and encode writes. Defaults to the fastest installed
+        """
+        if not key or not secret:
+            raise Exception(
+                'The Assembla API requires your API \'key\' and \'secret\', '
+                'accessible from https://www.assembla.com/user/edit/manage_clients'
+            )
+        self.key = key
+        self.secret = secret
+        self.connection_limit = connection_limit
+        self.cache = cache if cache is not None else LRUCache()
+        self.serializer = serializer if serializer is not None else get_serializer()
+        # Prefixes cache keys, so that responses are never shared across credentials
+        self.cache_prefix = hashlib.sha1('{0}:{1}'.format(key, secret).encode('utf-8')).hexdigest()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @property
+    def session(self):
+        """
+        The pooled connections shared by every request, created on first use
+        so that they are bound to the running event loop
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.connection_limit),
+                headers={
+                    'X-Api-Key': self.key,
+                    'X-Api-Secret': self.secret,
+                },
+            )
+        return self._session
+
+    async def close(self):
+        """
+        Release the pooled connections
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @assembla_filter
+    async def stream(self, extra_params=None):
+        """
+        All Events available
+        """
+        return await self._get_json(Event, extra_params=extra_params)
+
+    @assembla_filter
+    async def spaces(self, extra_params=None):
+        """
+        All Spaces available
+        """
+        return await self._get_json(Space, extra_params=extra_params)
+
+    async def iter_json(self, model, space=None, rel_path=None, extra_params=None, get_all=None):
+        """
+        Asynchronously yields instances of `model`, only fetching the next
+        page of results once the previous one has been consumed
+        """
+        async for json_response in self._iter_pages(model, space, rel_path, extra_params, get_all):
+            for obj in json_response:
+                yield self._bind_variables(model(data=obj), space)
+
+    async def _get_json(self, model, space=None, rel_path=None, extra_params=None, get_all=None):
+        """
+        Base level method for fetching data from the API
+        """
+        return [
+            instance async for instance in
+            self.iter_json(model, space, rel_path, extra_params, get_all)
+        ]
+
+    async def _iter_pages(self, model, space=None, rel_path=None, extra_params=None, get_all=None):
+        """
+        Yields the decoded JSON of each page of results
+        """
+        # Only AsyncAPI.spaces and AsyncAPI.event should not provide
+        # the `space argument
+        if space is None and model not in (Space, Event):
+            raise Exception(
+                'In general, `AsyncAPI._get_json` should always '
+                'be called with a `space` argument.'
+            )
+
+        # Copy the params, so that advancing the page number
+        # does not mutate the caller's dictionary
+        params = dict(extra_params or {})
+        rel_path = rel_path or model.rel_path
+
+        # Handle pagination for requests carrying large amounts of data
+        params['page'] = params.get('page', 1)
+        per_page = params.get('per_page', None)
+
+        concurrent = False
+        while True:
+            if concurrent:
+                # Speculatively fetch the next few pages in parallel
+                window = await asyncio.gather(*[
+                    self._get_page(model, rel_path, dict(params, page=page))
+                    for page in range(params['page'], params['page'] + self.page_workers)
+                ])
+            else:
+                window = [await self._get_page(model, rel_path, params)]
+
+            for json_response in window:
+                yield json_response
+                # Stop once a page comes back with less than a full set of results
+                if not (get_all and per_page and len(json_response) == per_page):
+                    return
+            params['page'] += len(window)
+
+            concurrent = self.page_workers > 1
+
+    async def _get_page(self, model, rel_path, params):
+        """
+        Fetches and decodes a single page of results
+        """
+        # Generate the url to hit
+        url = '{0}/{1}/{2}.json?{3}'.format(
+            settings.API_ROOT_PATH,
+            settings.API_VERSION,
+            rel_path,
+            urlencode(params),
+        )
+
+        # If the cache is being used and holds a fresh copy of the url
+        entry = None
+        if self.cache_responses:
+            cache_key = '{0}:{1}'.format(self.cache_prefix, url)
+            entry = self.cache.get_entry(cache_key)
+            if entry is not None and entry.is_fresh():
+                # Instances copy their data before modifying it,
+                # so the cached objects can be handed out directly
+                return entry.value
+
+        # Ask Assembla to confirm whether a stale copy is still valid
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+
+        async with self.session.get(url, headers=headers) as response:
+            if response.status == 304 and entry is not None:  # Not Modified
+                self.cache.increment('revalidated')
+                # Extend the lifetime of the cached copy and hand it out
+                self.cache.set(
+                    cache_key,
+                    entry.value,
+                    ttl=self.cache.ttl_for(model),
+                    etag=response.headers.get('ETag', entry.etag),
+                    last_modified=response.headers.get('Last-Modified', entry.last_modified),
+                )
+                return entry.value
+            elif response.status == 200:  # OK
+                json_response = self.serializer.loads(await response.read())
+            elif response.status == 204:  # No Content
+                json_response = []
+            else:  # Most likely a 404 Not Found
+                raise api.APIError(response.status, url, await response.text())
+
+        # If the cache is being used, update it
+        if self.cache_responses:
+            if entry is not None:
+                self.cache.increment('refetched')
+            self.cache.set(
+                cache_key,
+                json_response,
+                ttl=self.cache.ttl_for(model),
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'),
+            )
+
+        return json_response
+
+    async def _post_json(self, instance, space=None, rel_path=None, extra_params=None):
+        """
+        Base level method for updating data via the API
+        """
+
+        model = type(instance)
+
+        # Only AsyncAPI.spaces and AsyncAPI.event should not provide
+        # the `space argument
+        if space is None and model not in (Space, Event):
+            raise Exception(
+                'In general, `AsyncAPI._post_json` should always '
+                'be called with a `space` argument.'
+            )
+
+        if 'number' in instance:
+            raise AttributeError(
+                'You cannot create a ticket which already has a number'
+            )
+
+        # Generate the url to hit
+        url = '{0}/{1}/{2}?{3}'.format(
+            settings.API_ROOT_PATH,
+            settings.API_VERSION,
+            rel_path or model.rel_path,
+            urlencode(extra_params or {}),
+        )
+
+        async with self.session.post(
+            url,
+            data=self.serializer.dumps(dict(instance.items())),
+            headers={'Content-type': 'application/json'},
+        ) as response:
+            if response.status == 201:  # OK
+                return self._bind_variables(
+                    model(data=self.serializer.loads(await response.read())),
+                    space
+                )
+            else:  # Most likely a 404 Not Found
+                raise api.APIError(response.status, url, await response.text())
+
+    async def _put_json(self, instance, space=None, rel_path=None, extra_params=None, id_field=None):
+        """
+        Base level method for adding new data to the API
+        """
+
+        model = type(instance)
+
+        # Only AsyncAPI.spaces and AsyncAPI.event should not provide
+        # the `space argument
+        if space is None and model not in (Space, Event):
+            raise Exception(
+                'In general, `AsyncAPI._put_json` should always '
+                'be called with a `space` argument.'
+            )
+
+        # Generate the url to hit
+        url = '{0}/{1}/{2}/{3}.json?{4}'.format(
+            settings.API_ROOT_PATH,
+            settings.API_VERSION,
+            rel_path or model.rel_path,
+            instance[id_field or 'number'],
+            urlencode(extra_params or {}),
+        )
+
+        # Only send the fields which have been modified
+        changes = instance.changes()
+        if not changes:
+            return instance
+
+        async with self.session.put(
+            url,
+            data=self.serializer.dumps(changes),
+            headers={'Content-type': 'application/json'},
+        ) as response:
+            if response.status == 204:  # OK
+                instance.mark_clean()
+                return instance
+            else:  # Most likely a 404 Not Found
+                raise api.APIError(response.status, url, await response.text())
+
+    async def _delete_json(self, instance, space=None, rel_path=None, extra_params=None, id_field=None, append_to_path=None):
+        """
+        Base level method for removing data from the API
+        """
+
+        model = type(instance)
+
+        # Only AsyncAPI.spaces and AsyncAPI.event should not provide
+        # the `space argument
+        if space is None and model not in (Space, Event):
+            raise Exception(
+                'In general, `AsyncAPI._delete_json` should always '
+                'be called with a `space` argument.'
+            )
+
+        id_field = id_field or 'number'
+
+        if not instance.get(id_field, None):
+            raise AttributeError(
+                '%s does not have a value for the id field \'%s\'' % (
+                    instance.__class__.__name__,
+                    id_field
+                )
+            )
+
+        # Generate the url to hit
+        url = '{0}/{1}/{2}/{3}{4}.json?{5}'.format(
+            settings.API_ROOT_PATH,
+            settings.API_VERSION,
+            rel_path or model.rel_path,
+            instance[id_field],
+            append_to_path or '',
+            urlencode(extra_params or {}),
+        )
+
+        async with self.session.delete(
+            url,
+            headers={'Content-type': 'application/json'},
+        ) as response:
+            if response.status == 204:  # OK
+                return True
+            else:  # Most likely a 404 Not Found
+                raise api.APIError(response.status, url, await response.text())
+
+    def _bind_variables(self, instance, space):
+        """
+        Bind related variables to an instance retrieved from the API
+        """
+        # The instance's data matches Assembla's copy
+        instance.mark_clean()
+        instance.api = self
+        if space:
+            instance.space = space
+        return instance
+
+
+class Event(api.Event):
+    pass
+
+
+class Space(api.Space):
+
+    @assembla_filter
+    async def tickets(self, extra_params=None):
+        """
+        All Tickets in this Space
+        """
+        return [ticket async for ticket in self.iter_tickets(extra_params=extra_params)]
+
+    def iter_tickets(self, extra_params=None):
+        """
+        Asynchronously yields all Tickets in this Space, page by page
+        """
+
+        # Default params
+        params = {
+            'per_page': settings.MAX_PER_PAGE,
+            'report': 0,  # Report 0 is all tickets
+        }
+
+        if extra_params:
+            params.update(extra_params)
+
+        return self.api.iter_json(
+            Ticket,
+            space=self,
+            rel_path=self._build_rel_path('tickets'),
+            extra_params=params,
+            get_all=True,  # Retrieve all tickets in the space
+        )
+
+    async def sync_tickets(self, store=None, since=None, extra_params=None):
+        """
+        Fetches the Tickets which have been updated since the last sync,
+        merges them into `store` and returns the ones which changed
+        """
+        if store is None:
+            store = TicketStore()
+        if since is None:
+            since = store.watermark(self['id'])
+
+        # Request the most recently updated tickets first
+        params = {
+            'sort_by': 'updated_at',
+            'sort_order': 'desc',
+        }
+
+        if extra_params:
+            params.update(extra_params)
+
+        tickets = []
+        pages = self.iter_tickets(extra_params=params)
+        try:
+            async for ticket in pages:
+                # Tickets updated at the watermark itself are refetched, as
+                # others may have been updated within the same second
+                if since and ticket.get('updated_at', None) < since:
+                    # Everything after this ticket is older, so stop paging
+                    break
+                tickets.append(ticket)
+        finally:
+            await pages.aclose()
+
+        return store.merge(self['id'], tickets)
+
+    @assembla_filter
+    async def milestones(self, extra_params=None):
+        """
+        All Milestones in this Space
+        """
+
+        # Default params
+        params = {
+            'per_page': settings.MAX_PER_PAGE,
+        }
+
+        if extra_params:
+            params.update(extra_params)
+
+        return await self.api._get_json(
+            Milestone,
+            space=self,
+            rel_path=self._build_rel_path('milestones/all'),
+            extra_params=params,
+            get_all=True,  # Retrieve all milestones in the space
+        )
+
+    @assembla_filter
+    async def tools(self, extra_params=None):
+        """
+        All Tools in this Space
+        """
+        return await self.api._get_json(
+            SpaceTool,
+            space=self,
+            rel_path=self._build_rel_path('space_tools'),
+            extra_params=extra_params,
+        )
+
+    @assembla_filter
+    async def components(self, extra_params=None):
+        """
+        All components in this Space
+        """
+        return await self.api._get_json(
+            Component,
+            space=self,
+            rel_path=self._build_rel_path('ticket_components'),
+            extra_params=extra_params,
+        )
+
+    @assembla_filter
+    async def users(self, extra_params=None):
+        """
+        All Users with access to this Space
+        """
+        return await self.api._get_json(
+            User,
+            space=self,
+            rel_path=self._build_rel_path('users'),
+            extra_params=extra_params,
+        )
+
+    @assembla_filter
+    async def tags(self, extra_params=None):
+        """
+        All Tags in this Space
+        """
+        return await self.api._get_json(
+            Tag,
+            space=self,
+            rel_path=self._build_rel_path('tags'),
+            extra_params=extra_params,
+        )
+
+    @assembla_filter
+    async def wiki_pages(self, extra_params=None):
+        """
+        All Wiki Pages with access to this Space
+        """
+        return await self.api._get_json(
+            WikiPage,
+            space=self,
+            rel_path=self._build_rel_path('wiki_pages'),
+            extra_params=extra_params,
+        )
+
+    async def write_tickets(self, tickets, concurrency=None):
+        """
+        Creates or updates many Tickets concurrently, returning a BulkResult
+        """
+        return await self._bulk(lambda ticket: ticket.write(), tickets, concurrency)
+
+    async def delete_tickets(self, tickets, concurrency=None):
+        """
+        Removes many Tickets concurrently, returning a BulkResult
+        """
+        return await self._bulk(lambda ticket: ticket.delete(), tickets, concurrency)
+
+    async def _bulk(self, method, tickets, concurrency=None):
+        """
+        Awaits `method` for each Ticket, with at most `concurrency` in flight
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.BULK_CONCURRENCY)
+
+        async def apply(ticket):
+            if not hasattr(ticket, 'space'):
+                ticket.space = self
+            async with semaphore:
+                try:
+                    return ticket, await method(ticket), None
+                except Exception as e:
+                    return ticket, None, e
+
+        result = BulkResult()
+        for ticket, returned, error in await asyncio.gather(*[apply(ticket) for ticket in tickets]):
+            if error is None:
+                result.successes.append((ticket, returned))
+            else:
+                result.failures.append((ticket, error))
+        return result
+
+    async def comments_for(self, tickets, concurrency=None):
+        """
+        Fetches the Comments of many Tickets concurrently, returning a
+        dictionary mapping each ticket's number to its comments
+        """
+        return dict([result async for result in self.iter_comments_for(tickets, concurrency)])
+
+    async def iter_comments_for(self, tickets, concurrency=None):
+        """
+        Yields a (ticket number, comments) pair for each of the Tickets, in
+        the order that their comments arrive. Each ticket is only fetched once
+        """
+        unique = {}
+        for ticket in tickets:
+            if not hasattr(ticket, 'space'):
+                ticket.space = self
+            if not hasattr(ticket, 'api'):
+                ticket.api = self.api
+            unique.setdefault(ticket['number'], ticket)
+
+        semaphore = asyncio.Semaphore(concurrency or settings.BULK_CONCURRENCY)
+
+        async def fetch(ticket):
+            async with semaphore:
+                return ticket['number'], await ticket.comments()
+
+        pending = [asyncio.ensure_future(fetch(ticket)) for ticket in unique.values()]
+        try:
+            for future in asyncio.as_completed(pending):
+                yield await future
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def lookup(self, method_name, id):
+        """
+        Returns the object with the given id from one of the Space's listing
+        methods, see `assembla.api.Space.lookup`
+        """
+        if not hasattr(self, 'lookup_tables'):
+            self.clear_lookup_tables()
+        table = self.lookup_tables.get(method_name, None)
+        if table is None or id not in table or time.time() >= self.lookup_expires[method_name]:
+            table = self.lookup_tables[method_name] = dict(
+                (obj['id'], obj) for obj in await getattr(self, method_name)()
+            )
+            self.lookup_expires[method_name] = time.time() + settings.LOOKUP_TABLE_TTL
+        return table.get(id, None)
+
+    async def prefetch_related(self, tickets, relations=None):
+        """
+        Resolves the related objects of every Ticket in `tickets`, fetching
+        each listing at most once, see `assembla.api.Space.prefetch_related`
+        """
+        for relation in relations or Ticket.relations.keys():
+            method_name, field = Ticket.relations[relation]
+            for ticket in tickets:
+                related_id = ticket.get(field, None)
+                if related_id:
+                    if not hasattr(ticket, 'related'):
+                        ticket.related = {}
+                    ticket.related[relation] = await self.lookup(method_name, related_id)
+        return tickets
+
+
+class SpaceTool(api.SpaceTool):
+    pass
+
+
+class Component(api.Component):
+    pass
+
+
+class Milestone(api.Milestone):
+
+    @assembla_filter
+    async def tickets(self, extra_params=None):
+        """
+        All Tickets which are a part of this Milestone
+        """
+
+        # Default params
+        params = {
+            'per_page': settings.MAX_PER_PAGE,
+            'ticket_status': 'all',  # Both active and closed tickets
+        }
+
+        if extra_params:
+            params.update(extra_params)
+
+        try:
+            return await self.api._get_json(
+                Ticket,
+                space=self.space,
+                rel_path=self.space._build_rel_path('tickets/milestone/%s' % self['id']),
+                extra_params=params,
+                get_all=True,  # Retrieve all tickets in the milestone
+            )
+        except api.APIError as e:
+            if e.status_code != 404:
+                raise
+            # Fall back to filtering every ticket in the space
+            return await self.space.tickets(milestone_id=self['id'], extra_params=extra_params)
+
+
+class Ticket(api.Ticket):
+
+    async def tags(self, extra_params=None):
+        """
+        All Tags in this Ticket
+        """
+
+        # Default params
+        params = {
+            'per_page': settings.MAX_PER_PAGE,
+        }
+
+        if extra_params:
+            params.update(extra_params)
+
+        return await self.api._get_json(
+            Tag,
+            space=self.space,
+            rel_path=self.space._build_rel_path(
+                'tickets/%s/tags' % self['number']
+            ),
+            extra_params=params,
+            get_all=True,  # Retrieve all tags in the ticket
+        )
+
+    async def milestone(self, extra_params=None):
+        """
+        The Milestone that the Ticket is a part of
+        """
+        return await self._related('milestone', extra_params)
+
+    async def user(self, extra_params=None):
+        """
+        The User currently assigned to the Ticket
+        """
+        return await self._related('user', extra_params)
+
+    async def component(self, extra_params=None):
+        """
+        The Component currently assigned to the Ticket
+        """
+        return await self._related('component', extra_params)
+
+    async def _related(self, relation, extra_params=None):
+        """
+        Resolves one of the Ticket's `relations`, see `assembla.api.Ticket._related`
+        """
+        method_name, field = self.relations[relation]
+        related_id = self.get(field, None)
+        if not related_id:
+            return None
+
+        if extra_params:
+            # Bypass the lookup tables, as the parameters may change the results
+            results = await getattr(self.space, method_name)(id=related_id, extra_params=extra_params)
+            if results:
+                return results[0]
+            return None
+
+        related = getattr(self, 'related', {}).get(relation, None)
+        if related is not None and related['id'] == related_id:
+            return related
+        return await self.space.lookup(method_name, related_id)
+
+    @assembla_filter
+    async def comments(self, extra_params=None):
+        """
+        All Comments in this Ticket
+        """
+        return [comment async for comment in self.iter_comments(extra_params=extra_params)]
+
+    def iter_comments(self, extra_params=None):
+        """
+        Asynchronously yields all Comments in this Ticket, page by page
+        """
+
+        # Default params
+        params = {
+            'per_page': settings.MAX_PER_PAGE,
+        }
+
+        if extra_params:
+            params.update(extra_params)
+
+        return self.api.iter_json(
+            TicketComment,
+            space=self.space,
+            rel_path=self.space._build_rel_path(
+                'tickets/%s/ticket_comments' % self['number']
+            ),
+            extra_params=params,
+            get_all=True,  # Retrieve all comments in the ticket
+        )
+
+    async def write(self):
+        """
+        Create or update the Ticket on Assembla
+        """
+        if not hasattr(self, 'space'):
+            raise AttributeError("A ticket must have a 'space' attribute before you can write it to Assembla.")
+
+        if self.get('number'):  # Modifying an existing ticket
+            method = self.space.api._put_json
+        else:  # Creating a new ticket
+            method = self.space.api._post_json
+
+        return await method(
+            self,
+            space=self.space,
+            rel_path=self.space._build_rel_path('tickets'),
+        )
+
+    async def delete(self):
+        """
+        Remove the Ticket from Assembla
+        """
+        if not hasattr(self, 'space'):
+            raise AttributeError("A ticket must have a 'space' attribute before you can remove it from Assembla.")
+
+        return await self.space.api._delete_json(
+            self,
+            space=self.space,
+            rel_path=self.space._build_rel_path('tickets'),
+        )
+
+
+class TicketComment(api.TicketComment):
+    pass
+
+
+class Tag(api.Tag):
+    pass
+
+
+class User(api.User):
+
+    @assembla_filter
+    async def tickets(self, extra_params=None):
+        """
+        A User's tickets across all available spaces, which are
+        fetched concurrently
+        """
+        spaces = await self.api.spaces()
+        results = await asyncio.gather(*[
+            space.tickets(assigned_to_id=self['id'], extra_params=extra_params)
+            for space in spaces
+        ])
+        return [ticket for tickets in results for ticket in tickets]
+
+
+class WikiPage(api.WikiPage):
+
+    async def write(self):
+        """
+        Create or update a Wiki Page on Assembla
+        """
+        if not hasattr(self, 'space'):
+            raise AttributeError("A WikiPage must have a 'space' attribute before you can write it to Assembla.")
+
+        self.api = self.space.api
+
+        if self.get('id'):  # We are modifying an existing wiki page
+            return await self.api._put_json(
+                self,
+                space=self.space,
+                rel_path=self.space._build_rel_path('wiki_pages'),
+                id_field='id'
+            )
+        else:  # Creating a new wiki page
+            return await self.api._post_json(
+                self,
+                space=self.space,
+                rel_path=self.space._build_rel_path('wiki_pages'),
+            )
+
+    async def delete(self):
+        """
+        Remove the WikiPage from Assembla
+        """
+        if not hasattr(self, 'space'):
+            raise AttributeError("A WikiPage must have a 'space' attribute before you can remove it from Assembla.")
+
+        self.api = self.space.api
+
+        return await self.api._delete_json(
+            self,
+            space=self.space,
+            rel_path=self.space._build_rel_path('wiki_pages'),
+            id_field='id',
+            append_to_path='/container'
+        )
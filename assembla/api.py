@@ -1,20 +1,75 @@
 import urllib
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
 import requests
-import json
-from assembla.lib import AssemblaObject, assembla_filter
+from requests.adapters import HTTPAdapter
+from assembla.lib import AssemblaObject, AssemblaCollection, BulkResult, CompactData, assembla_filter
+from assembla.cache import LRUCache
+from assembla.scheduler import RequestScheduler
+from assembla.serializers import get_serializer
+from assembla.sync import TicketStore
 import settings
 
 
+class APIError(Exception):
+    """
+    Raised when Assembla responds with an unexpected status code
+    """
+    def __init__(self, status_code, url, text):
+        super(APIError, self).__init__(
+            'Code {0} returned from `{1}`. Response text: "{2}".'.format(status_code, url, text)
+        )
+        self.status_code = status_code
+        self.url = url
+        self.text = text
+
+
+class InFlightRequest(object):
+    """
+    A request which other threads are waiting on the result of
+    """
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
 class API(object):
     cache_responses = False
-    cache = {}
-
-    def __init__(self, key=None, secret=None):
+    # The number of pages to fetch concurrently once a paginated
+    # request has shown that more than one page of results exists
+    page_workers = 1
+    # The number of spaces to query concurrently, when a request
+    # spans every space (eg: `User.tickets`)
+    space_workers = 4
+    # Store the data of retrieved objects as CompactData rather than
+    # dictionaries, which uses far less memory for large listings
+    compact_models = False
+
+    def __init__(self, key=None, secret=None, cache=None, pool_size=None, max_retries=None, scheduler=None, serializer=None):
         """
         :key,
         :secret
             Your Assembla API access details, available from
             https://www.assembla.com/user/edit/manage_clients
+        :cache
+            An optional instance of a cache backend from `assembla.cache`,
+            used when `cache_responses` is True. Defaults to an LRUCache
+        :pool_size
+            The number of connections to Assembla which are kept alive for
+            reuse. Defaults to `settings.POOL_SIZE`
+        :max_retries
+            The number of times that a request which failed to connect is
+            retried. Defaults to `settings.MAX_RETRIES`
+        :scheduler
+            An optional `assembla.scheduler.RequestScheduler`, which paces
+            and retries every request. Defaults to one configured from settings
+        :serializer
+            An optional serializer from `assembla.serializers`, used to decode
+            responses and encode writes. Defaults to the fastest installed
         """
         if not key or not secret:
             raise Exception(
@@ -23,7 +78,31 @@ class API(object):
             )
         self.key = key
         self.secret = secret
+        # Every request is sent through the session, so that
+        # connections are pooled and kept alive between requests
         self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_maxsize=settings.POOL_SIZE if pool_size is None else pool_size,
+            max_retries=settings.MAX_RETRIES if max_retries is None else max_retries,
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.cache = cache if cache is not None else LRUCache()
+        self.scheduler = scheduler if scheduler is not None else RequestScheduler()
+        self.serializer = serializer if serializer is not None else get_serializer()
+        # Url -> InFlightRequest, for the pages currently being fetched
+        self.in_flight = {}
+        self.in_flight_lock = threading.Lock()
+        # Functions called with the method and url of each request before it
+        # is sent, and with its method, url, response (or None if it failed
+        # to connect), duration in seconds and body once it completes
+        self.before_request = []
+        self.after_request = []
+        # Functions called with the path of each paginated listing and
+        # the number of pages fetched, once it is exhausted
+        self.after_listing = []
+        # Prefixes cache keys, so that responses are never shared across credentials
+        self.cache_prefix = hashlib.sha1('{0}:{1}'.format(key, secret).encode('utf-8')).hexdigest()
 
     @assembla_filter
     def stream(self, extra_params=None):
@@ -32,6 +111,99 @@ class API(object):
         """
         return self._get_json(Event, extra_params=extra_params)
 
+    def stream_follow(self, extra_params=None, since=None, processed=None, min_interval=None, max_interval=None, stop=None):
+        """
+        Yields Events continuously, oldest first, as they occur.
+
+        Only events newer than the latest one seen are requested. Each event is
+        yielded once, even though Assembla's minute resolution filter returns
+        some events again. When no new events arrive, the time between polls
+        doubles up to `max_interval`, and it resets once activity resumes.
+
+        :since
+            The `date` of the latest event already processed, eg: from a previous
+            run. Defaults to starting with the most recent page of events
+        :processed
+            The keys (see `Event.key`) of the events dated `since` which have
+            already been processed. Other events with that date are yielded,
+            as they may have been recorded after the previous run stopped
+        :min_interval,
+        :max_interval
+            The shortest and longest number of seconds to wait between polls.
+            Default to `settings.STREAM_MIN_INTERVAL` and `settings.STREAM_MAX_INTERVAL`
+        :stop
+            An optional `threading.Event`, which ends the stream once set
+        """
+        min_interval = settings.STREAM_MIN_INTERVAL if min_interval is None else min_interval
+        max_interval = settings.STREAM_MAX_INTERVAL if max_interval is None else max_interval
+        interval = min_interval
+        cursor = since
+        # The keys of recently yielded events, oldest first, bounded
+        # to `settings.STREAM_DEDUPE_SIZE` entries
+        seen = OrderedDict((key, True) for key in processed or ())
+
+        while stop is None or not stop.is_set():
+            if self.cache_responses:
+                # Every poll must reach Assembla
+                self.invalidate('activity')
+            params = dict(extra_params or {}, per_page=settings.MAX_PER_PAGE)
+            if cursor:
+                # Assembla filters by minute, eg: '2014-01-19 09:20'
+                params['from'] = cursor.replace('T', ' ')[:16]
+
+            events = []
+            for event in self.iter_json(Event, extra_params=params, get_all=cursor is not None):
+                key = event.key
+                date = event.get('date', '')
+                # Skip events which have been processed, and those from
+                # before the cursor
+                if key in seen or (cursor and date < cursor):
+                    continue
+                seen[key] = True
+                events.append(event)
+            while len(seen) > settings.STREAM_DEDUPE_SIZE:
+                seen.popitem(last=False)
+
+            if events:
+                interval = min_interval
+                events.sort(key=lambda event: event.get('date', ''))
+                cursor = max(cursor, events[-1].get('date', '')) if cursor else events[-1].get('date', '')
+                for event in events:
+                    yield event
+            else:
+                interval = min(max_interval, interval * 2)
+
+            if stop is None:
+                time.sleep(interval)
+            else:
+                stop.wait(interval)
+
+    def invalidate(self, rel_path):
+        """
+        Removes every cached response for the urls beneath `rel_path`,
+        eg: 'spaces/my-space/tickets'. Returns the number removed
+        """
+        return self.cache.delete_prefix('{0}:{1}/{2}/{3}'.format(
+            self.cache_prefix,
+            settings.API_ROOT_PATH,
+            settings.API_VERSION,
+            rel_path,
+        ))
+
+    def invalidate_event(self, event):
+        """
+        Removes the cached responses which `event` may have made out of date,
+        as described by `settings.CACHE_INVALIDATIONS`. Returns the number removed
+        """
+        space_id = event.get('space_id')
+        if not space_id:
+            return 0
+        paths = settings.CACHE_INVALIDATIONS.get(event.get('object'), ('',))
+        return sum(
+            self.invalidate('spaces/{0}/{1}'.format(space_id, path))
+            for path in paths
+        )
+
     @assembla_filter
     def spaces(self, extra_params=None):
         """
@@ -39,9 +211,39 @@ class API(object):
         """
         return self._get_json(Space, extra_params=extra_params)
 
+    def iter_json(self, model, space=None, rel_path=None, extra_params=None, get_all=None):
+        """
+        Lazily yields instances of `model`, only fetching the next page of
+        results once the previous one has been consumed
+        """
+        for json_response in self._iter_pages(model, space, rel_path, extra_params, get_all):
+            for obj in self._records(json_response):
+                yield self._bind_variables(model(data=obj), space)
+
     def _get_json(self, model, space=None, rel_path=None, extra_params=None, get_all=None):
         """
-        Base level method for fetching data from the API
+        Base level method for fetching data from the API. Instances of
+        `model` are only created as the collection's items are accessed
+        """
+        records = []
+        for json_response in self._iter_pages(model, space, rel_path, extra_params, get_all):
+            records.extend(self._records(json_response))
+        return AssemblaCollection.lazy(
+            records,
+            lambda obj: self._bind_variables(model(data=obj), space)
+        )
+
+    def _records(self, json_response):
+        """
+        The data to store for each object in a page of results
+        """
+        if self.compact_models:
+            return [CompactData(obj) for obj in json_response]
+        return json_response
+
+    def _iter_pages(self, model, space=None, rel_path=None, extra_params=None, get_all=None):
+        """
+        Yields the decoded JSON of each page of results
         """
         # Only API.spaces and API.event should not provide
         # the `space argument
@@ -51,66 +253,157 @@ class API(object):
                 'be called with a `space` argument.'
             )
 
-        if not extra_params:
-            extra_params = {}
+        # Copy the params, so that advancing the page number
+        # does not mutate the caller's dictionary
+        params = dict(extra_params or {})
+        rel_path = rel_path or model.rel_path
 
         # Handle pagination for requests carrying large amounts of data
-        extra_params['page'] = extra_params.get('page', 1)
-
+        params['page'] = params.get('page', 1)
+        per_page = params.get('per_page', None)
+
+        pool = None
+        pages = 0
+        try:
+            while True:
+                if pool:
+                    # Speculatively fetch the next few pages in parallel
+                    window = pool.map(
+                        lambda page: self._get_page(model, rel_path, dict(params, page=page)),
+                        range(params['page'], params['page'] + self.page_workers)
+                    )
+                else:
+                    window = [self._get_page(model, rel_path, params)]
+                pages += len(window)
+
+                for json_response in window:
+                    yield json_response
+                    # Stop once a page comes back with less than a full set of results
+                    if not (get_all and per_page and len(json_response) == per_page):
+                        return
+                params['page'] += len(window)
+
+                if pool is None and self.page_workers > 1:
+                    pool = ThreadPool(self.page_workers)
+        finally:
+            if pool:
+                pool.terminate()
+            for hook in self.after_listing:
+                hook(rel_path, pages)
+
+    def _send(self, method, url, **kwargs):
+        """
+        Sends a single request through the session, notifying the request hooks
+        """
+        for hook in self.before_request:
+            hook(method, url)
+        start = time.time()
+        response = None
+        try:
+            response = self.session.request(method, url, **kwargs)
+        finally:
+            duration = time.time() - start
+            for hook in self.after_request:
+                hook(method, url, response, duration, kwargs.get('data'))
+        return response
+
+    def _get_page(self, model, rel_path, params):
+        """
+        Fetches and decodes a single page of results. Concurrent requests
+        for the same page share a single request to Assembla
+        """
         # Generate the url to hit
         url = '{0}/{1}/{2}.json?{3}'.format(
             settings.API_ROOT_PATH,
             settings.API_VERSION,
-            rel_path or model.rel_path,
-            urllib.urlencode(extra_params),
+            rel_path,
+            urllib.urlencode(params),
         )
 
-        # If the cache is being used and the url has been hit already
-        if self.cache_responses and url in self.cache:
-            response = self.cache[url]
-        else:
-            # Fetch the data
-            headers = {
-                'X-Api-Key': self.key,
-                'X-Api-Secret': self.secret,
-            }
-            response = self.session.get(url=url, headers=headers)
-            # If the cache is being used, update it
-            if self.cache_responses:
-                self.cache[url] = response
-
-        if response.status_code == 200:  # OK
-            results = []
-            json_response = response.json()
-            for obj in json_response:
-                instance = model(data=obj)
-                instance.api = self
-                if space:
-                    instance.space = space
-                results.append(instance)
-            # If it looks like there are more pages to fetch,
-            # try and fetch the next one
-            per_page = extra_params.get('per_page', None)
-            if (
-                get_all
-                and per_page
-                and len(json_response)
-                and per_page == len(json_response)
-            ):
-                extra_params['page'] += 1
-                results = results + self._get_json(model, space, rel_path, extra_params, get_all=get_all)
-            return results
+        with self.in_flight_lock:
+            request = self.in_flight.get(url, None)
+            waiting = request is not None
+            if not waiting:
+                request = self.in_flight[url] = InFlightRequest()
+
+        if waiting:
+            request.done.wait()
+            if request.error is not None:
+                raise request.error
+            return request.result
+
+        try:
+            request.result = self._fetch_page(model, url)
+            return request.result
+        except Exception as e:
+            request.error = e
+            raise
+        finally:
+            with self.in_flight_lock:
+                del self.in_flight[url]
+            request.done.set()
+
+    def _fetch_page(self, model, url):
+        """
+        Requests a page of results, consulting the cache if it is in use
+        """
+        # If the cache is being used and holds a fresh copy of the url
+        entry = None
+        if self.cache_responses:
+            cache_key = '{0}:{1}'.format(self.cache_prefix, url)
+            entry = self.cache.get_entry(cache_key)
+            if entry is not None and entry.is_fresh():
+                # Instances copy their data before modifying it,
+                # so the cached objects can be handed out directly
+                return entry.value
+
+        # Fetch the data
+        headers = {
+            'X-Api-Key': self.key,
+            'X-Api-Secret': self.secret,
+        }
+        # Ask Assembla to confirm whether a stale copy is still valid
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        response = self.scheduler.request(
+            lambda: self._send('GET', url=url, headers=headers)
+        )
+
+        if response.status_code == 304 and entry is not None:  # Not Modified
+            self.cache.increment('revalidated')
+            # Extend the lifetime of the cached copy and hand it out
+            self.cache.set(
+                cache_key,
+                entry.value,
+                ttl=self.cache.ttl_for(model),
+                etag=response.headers.get('ETag', entry.etag),
+                last_modified=response.headers.get('Last-Modified', entry.last_modified),
+            )
+            return entry.value
+        elif response.status_code == 200:  # OK
+            json_response = self.serializer.loads(response.content)
         elif response.status_code == 204:  # No Content
-            return []
+            json_response = []
         else:  # Most likely a 404 Not Found
-            raise Exception(
-                'Code {0} returned from `{1}`. Response text: "{2}".'.format(
-                    response.status_code,
-                    url,
-                    response.text
-                )
+            raise APIError(response.status_code, url, response.text)
+
+        # If the cache is being used, update it
+        if self.cache_responses:
+            if entry is not None:
+                self.cache.increment('refetched')
+            self.cache.set(
+                cache_key,
+                json_response,
+                ttl=self.cache.ttl_for(model),
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'),
             )
 
+        return json_response
+
     def _post_json(self, instance, space=None, rel_path=None, extra_params=None):
         """
         Base level method for updating data via the API
@@ -126,7 +419,7 @@ class API(object):
                 'be called with a `space` argument.'
             )
 
-        if 'number' in instance.data:
+        if 'number' in instance:
             raise AttributeError(
                 'You cannot create a ticket which already has a number'
             )
@@ -143,30 +436,24 @@ class API(object):
         )
 
         # Fetch the data
-        response = requests.post(
-            url=url,
-            data=json.dumps(instance.data),
-            headers={
-                'X-Api-Key': self.key,
-                'X-Api-Secret': self.secret,
-                'Content-type': "application/json",
-            },
+        response = self.scheduler.request(
+            lambda: self._send(
+                'POST',
+                url=url,
+                data=self.serializer.dumps(dict(instance.items())),
+                headers={
+                    'X-Api-Key': self.key,
+                    'X-Api-Secret': self.secret,
+                    'Content-type': "application/json",
+                },
+            ),
+            idempotent=False,
         )
 
         if response.status_code == 201:  # OK
-            instance = model(data=response.json())
-            instance.api = self
-            if space:
-                instance.space = space
-            return instance
+            return self._bind_variables(model(data=self.serializer.loads(response.content)), space)
         else:  # Most likely a 404 Not Found
-            raise Exception(
-                'Code {0} returned from `{1}`. Response text: "{2}".'.format(
-                    response.status_code,
-                    url,
-                    response.text
-                )
-            )
+            raise APIError(response.status_code, url, response.text)
 
     def _put_json(self, instance, space=None, rel_path=None, extra_params=None, id_field=None):
         """
@@ -198,27 +485,30 @@ class API(object):
             urllib.urlencode(extra_params),
         )
 
+        # Only send the fields which have been modified
+        changes = instance.changes()
+        if not changes:
+            return instance
+
         # Fetch the data
-        response = requests.put(
-            url=url,
-            data=json.dumps(instance.data),
-            headers={
-                'X-Api-Key': self.key,
-                'X-Api-Secret': self.secret,
-                'Content-type': "application/json",
-            },
+        response = self.scheduler.request(
+            lambda: self._send(
+                'PUT',
+                url=url,
+                data=self.serializer.dumps(changes),
+                headers={
+                    'X-Api-Key': self.key,
+                    'X-Api-Secret': self.secret,
+                    'Content-type': "application/json",
+                },
+            ),
         )
 
         if response.status_code == 204:  # OK
+            instance.mark_clean()
             return instance
         else:  # Most likely a 404 Not Found
-            raise Exception(
-                'Code {0} returned from `{1}`. Response text: "{2}".'.format(
-                    response.status_code,
-                    url,
-                    response.text
-                )
-            )
+            raise APIError(response.status_code, url, response.text)
 
     def _delete_json(self, instance, space=None, rel_path=None, extra_params=None, id_field=None, append_to_path=None):
         """
@@ -260,30 +550,29 @@ class API(object):
         )
 
         # Fetch the data
-        response = requests.delete(
-            url=url,
-            headers={
-                'X-Api-Key': self.key,
-                'X-Api-Secret': self.secret,
-                'Content-type': "application/json",
-            },
+        response = self.scheduler.request(
+            lambda: self._send(
+                'DELETE',
+                url=url,
+                headers={
+                    'X-Api-Key': self.key,
+                    'X-Api-Secret': self.secret,
+                    'Content-type': "application/json",
+                },
+            ),
         )
 
         if response.status_code == 204:  # OK
             return True
         else:  # Most likely a 404 Not Found
-            raise Exception(
-                'Code {0} returned from `{1}`. Response text: "{2}".'.format(
-                    response.status_code,
-                    url,
-                    response.text
-                )
-            )
+            raise APIError(response.status_code, url, response.text)
 
     def _bind_variables(self, instance, space):
         """
-        Bind related variables to the instance
+        Bind related variables to an instance retrieved from the API
         """
+        # The instance's data matches Assembla's copy
+        instance.mark_clean()
         instance.api = self
         if space:
             instance.space = space
@@ -293,6 +582,14 @@ class API(object):
 class Event(AssemblaObject):
     rel_path = 'activity'
 
+    @property
+    def key(self):
+        """
+        Identifies the Event, which has no id of its own, from the
+        fields listed in `settings.STREAM_KEY_FIELDS`
+        """
+        return tuple(repr(self.get(field)) for field in settings.STREAM_KEY_FIELDS)
+
 
 class Space(AssemblaObject):
     rel_path = 'spaces'
@@ -302,6 +599,15 @@ class Space(AssemblaObject):
         """
         All Tickets in this Space
         """
+        return self._tickets(self.api._get_json, extra_params)
+
+    def iter_tickets(self, extra_params=None):
+        """
+        Lazily yields all Tickets in this Space, fetching them page by page
+        """
+        return self._tickets(self.api.iter_json, extra_params)
+
+    def _tickets(self, method, extra_params=None):
 
         # Default params
         params = {
@@ -312,7 +618,7 @@ class Space(AssemblaObject):
         if extra_params:
             params.update(extra_params)
 
-        return self.api._get_json(
+        return method(
             Ticket,
             space=self,
             rel_path=self._build_rel_path('tickets'),
@@ -320,6 +626,42 @@ class Space(AssemblaObject):
             get_all=True,  # Retrieve all tickets in the space
         )
 
+    def sync_tickets(self, store=None, since=None, extra_params=None):
+        """
+        Fetches the Tickets which have been updated since the last sync,
+        merges them into `store` and returns the ones which changed
+
+        :store
+            An `assembla.sync.TicketStore` which holds the results of
+            previous syncs. If omitted, every ticket is fetched
+        :since
+            An `updated_at` value to sync from, overriding the store's watermark
+        """
+        if store is None:
+            store = TicketStore()
+        if since is None:
+            since = store.watermark(self['id'])
+
+        # Request the most recently updated tickets first
+        params = {
+            'sort_by': 'updated_at',
+            'sort_order': 'desc',
+        }
+
+        if extra_params:
+            params.update(extra_params)
+
+        tickets = []
+        for ticket in self.iter_tickets(extra_params=params):
+            # Tickets updated at the watermark itself are refetched, as
+            # others may have been updated within the same second
+            if since and ticket.get('updated_at', None) < since:
+                # Everything after this ticket is older, so stop paging
+                break
+            tickets.append(ticket)
+
+        return store.merge(self['id'], tickets)
+
     @assembla_filter
     def milestones(self, extra_params=None):
         """
@@ -402,6 +744,128 @@ class Space(AssemblaObject):
             extra_params=extra_params,
         )
 
+    def write_tickets(self, tickets, concurrency=None):
+        """
+        Creates or updates many Tickets concurrently. A failure does not
+        abort the rest of the batch, instead it is recorded in the
+        returned BulkResult
+
+        :concurrency
+            The number of writes in flight at once. Defaults to
+            `settings.BULK_CONCURRENCY`
+        """
+        return self._bulk(lambda ticket: ticket.write(), tickets, concurrency)
+
+    def delete_tickets(self, tickets, concurrency=None):
+        """
+        Removes many Tickets concurrently, returning a BulkResult
+        """
+        return self._bulk(lambda ticket: ticket.delete(), tickets, concurrency)
+
+    def _bulk(self, method, tickets, concurrency=None):
+        """
+        Applies `method` to each Ticket using a pool of workers
+        """
+        def apply(ticket):
+            if not hasattr(ticket, 'space'):
+                ticket.space = self
+            try:
+                return ticket, method(ticket), None
+            except Exception as e:
+                return ticket, None, e
+
+        result = BulkResult()
+        pool = ThreadPool(concurrency or settings.BULK_CONCURRENCY)
+        try:
+            for ticket, returned, error in pool.imap(apply, tickets):
+                if error is None:
+                    result.successes.append((ticket, returned))
+                else:
+                    result.failures.append((ticket, error))
+        finally:
+            pool.terminate()
+        return result
+
+    def comments_for(self, tickets, concurrency=None):
+        """
+        Fetches the Comments of many Tickets concurrently, returning a
+        dictionary mapping each ticket's number to its comments
+
+        :concurrency
+            The number of tickets whose comments are fetched at once.
+            Defaults to `settings.BULK_CONCURRENCY`
+        """
+        return dict(self.iter_comments_for(tickets, concurrency))
+
+    def iter_comments_for(self, tickets, concurrency=None):
+        """
+        Yields a (ticket number, comments) pair for each of the Tickets, in
+        the order that their comments arrive. Each ticket is only fetched once,
+        even if it is given more than once
+        """
+        unique = {}
+        for ticket in tickets:
+            if not hasattr(ticket, 'space'):
+                ticket.space = self
+            if not hasattr(ticket, 'api'):
+                ticket.api = self.api
+            unique.setdefault(ticket['number'], ticket)
+
+        pool = ThreadPool(concurrency or settings.BULK_CONCURRENCY)
+        try:
+            for result in pool.imap_unordered(
+                lambda ticket: (ticket['number'], ticket.comments()),
+                unique.values()
+            ):
+                yield result
+        finally:
+            pool.terminate()
+
+    def lookup(self, method_name, id):
+        """
+        Returns the object with the given id from one of the Space's listing
+        methods (eg: 'milestones'). The listing is held in `lookup_tables`
+        and reused for `settings.LOOKUP_TABLE_TTL` seconds. It is fetched
+        again sooner if `id` is not in it, as the object may be new
+        """
+        if not hasattr(self, 'lookup_tables'):
+            self.clear_lookup_tables()
+        table = self.lookup_tables.get(method_name, None)
+        if table is None or id not in table or time.time() >= self.lookup_expires[method_name]:
+            table = self.lookup_tables[method_name] = dict(
+                (obj['id'], obj) for obj in getattr(self, method_name)()
+            )
+            self.lookup_expires[method_name] = time.time() + settings.LOOKUP_TABLE_TTL
+        return table.get(id, None)
+
+    def clear_lookup_tables(self):
+        """
+        Discards the listings held for `lookup`, so that they are fetched again
+        """
+        self.lookup_tables = {}
+        # Method name -> the time at which its listing should be fetched again
+        self.lookup_expires = {}
+
+    def prefetch_related(self, tickets, relations=None):
+        """
+        Resolves the related objects of every Ticket in `tickets` in a single
+        pass, fetching each listing at most once, and attaches them to the
+        tickets so that `Ticket.milestone()` etc. return without fetching
+
+        :relations
+            The names of the relations to resolve, from `Ticket.relations`.
+            Defaults to all of them
+        """
+        for relation in relations or Ticket.relations.keys():
+            method_name, field = Ticket.relations[relation]
+            for ticket in tickets:
+                related_id = ticket.get(field, None)
+                if related_id:
+                    if not hasattr(ticket, 'related'):
+                        ticket.related = {}
+                    ticket.related[relation] = self.lookup(method_name, related_id)
+        return tickets
+
     def _build_rel_path(self, to_append=None):
         """
         Build a relative path to the API endpoint
@@ -427,13 +891,39 @@ class Milestone(AssemblaObject):
         """
         All Tickets which are a part of this Milestone
         """
-        return filter(
-            lambda ticket: ticket.get('milestone_id', None) == self['id'],
-            self.space.tickets(extra_params=extra_params)
-        )
+
+        # Default params
+        params = {
+            'per_page': settings.MAX_PER_PAGE,
+            'ticket_status': 'all',  # Both active and closed tickets
+        }
+
+        if extra_params:
+            params.update(extra_params)
+
+        try:
+            return self.api._get_json(
+                Ticket,
+                space=self.space,
+                rel_path=self.space._build_rel_path('tickets/milestone/%s' % self['id']),
+                extra_params=params,
+                get_all=True,  # Retrieve all tickets in the milestone
+            )
+        except APIError as e:
+            if e.status_code != 404:
+                raise
+            # Fall back to filtering every ticket in the space
+            return self.space.tickets(milestone_id=self['id'], extra_params=extra_params)
 
 
 class Ticket(AssemblaObject):
+    # Relation name -> (the Space method which lists the related
+    # objects, the Ticket field which holds the related object's id)
+    relations = {
+        'milestone': ('milestones', 'milestone_id'),
+        'user': ('users', 'assigned_to_id'),
+        'component': ('components', 'component_id'),
+    }
 
     def tags(self, extra_params=None):
         """
@@ -463,37 +953,56 @@ class Ticket(AssemblaObject):
         """
         The Milestone that the Ticket is a part of
         """
-        if self.get('milestone_id', None):
-            milestones = self.space.milestones(id=self['milestone_id'], extra_params=extra_params)
-            if milestones:
-                return milestones[0]
+        return self._related('milestone', extra_params)
 
     def user(self, extra_params=None):
         """
         The User currently assigned to the Ticket
         """
-        if self.get('assigned_to_id', None):
-            users = self.space.users(
-                id=self['assigned_to_id'],
-                extra_params=extra_params
-            )
-            if users:
-                return users[0]
+        return self._related('user', extra_params)
 
     def component(self, extra_params=None):
         """
         The Component currently assigned to the Ticket
         """
-        if self.get('component_id', None):
-            components = self.space.components(id=self['component_id'], extra_params=extra_params)
-            if components:
-                return components[0]
+        return self._related('component', extra_params)
+
+    def _related(self, relation, extra_params=None):
+        """
+        Resolves one of the Ticket's `relations`, using the objects
+        attached by `Space.prefetch_related` or the Space's lookup tables
+        """
+        method_name, field = self.relations[relation]
+        related_id = self.get(field, None)
+        if not related_id:
+            return None
+
+        if extra_params:
+            # Bypass the lookup tables, as the parameters may change the results
+            results = getattr(self.space, method_name)(id=related_id, extra_params=extra_params)
+            if results:
+                return results[0]
+            return None
+
+        related = getattr(self, 'related', {}).get(relation, None)
+        if related is not None and related['id'] == related_id:
+            return related
+        return self.space.lookup(method_name, related_id)
 
     @assembla_filter
     def comments(self, extra_params=None):
         """
         All Comments in this Ticket
         """
+        return self._comments(self.api._get_json, extra_params)
+
+    def iter_comments(self, extra_params=None):
+        """
+        Lazily yields all Comments in this Ticket, fetching them page by page
+        """
+        return self._comments(self.api.iter_json, extra_params)
+
+    def _comments(self, method, extra_params=None):
 
         # Default params
         params = {
@@ -503,7 +1012,7 @@ class Ticket(AssemblaObject):
         if extra_params:
             params.update(extra_params)
 
-        return self.api._get_json(
+        return method(
             TicketComment,
             space=self,
             rel_path=self.space._build_rel_path(
@@ -558,15 +1067,23 @@ class User(AssemblaObject):
     @assembla_filter
     def tickets(self, extra_params=None):
         """
-        A User's tickets across all available spaces
+        A User's tickets across all available spaces, which are
+        queried concurrently
         """
-        tickets = []
-        for space in self.api.spaces():
-            tickets += filter(
-                lambda ticket: ticket.get('assigned_to_id', None) == self['id'],
-                space.tickets(extra_params=extra_params)
+        spaces = self.api.spaces()
+        if not spaces:
+            return AssemblaCollection()
+
+        pool = ThreadPool(min(self.api.space_workers, len(spaces)))
+        try:
+            results = pool.map(
+                lambda space: space.tickets(assigned_to_id=self['id'], extra_params=extra_params),
+                spaces
             )
-        return tickets
+        finally:
+            pool.terminate()
+
+        return AssemblaCollection(ticket for tickets in results for ticket in tickets)
 
 
 class WikiPage(AssemblaObject):
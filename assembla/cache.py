@@ -0,0 +1,250 @@
+import os
+import time
+import json
+import sqlite3
+import threading
+from collections import OrderedDict, namedtuple
+import settings
+
+
+class CacheEntry(namedtuple('CacheEntry', ('value', 'expires', 'etag', 'last_modified'))):
+    """
+    A cached value, along with the validators needed to
+    revalidate it with Assembla once it has gone stale
+    """
+    def is_fresh(self):
+        return self.expires >= time.time()
+
+
+class BaseCache(object):
+    """
+    The interface expected of a response cache. Values are the decoded
+    JSON of a page of results, keyed by a string which identifies both the
+    url requested and the credentials used to request it.
+    """
+    def __init__(self, default_ttl=None, ttls=None):
+        """
+        :default_ttl
+            Seconds that entries are considered fresh for, if their model
+            does not have an entry in `ttls`
+        :ttls
+            A dictionary mapping model names (eg: 'Event') to the number of
+            seconds their responses are considered fresh for
+        """
+        self.default_ttl = settings.CACHE_TTL if default_ttl is None else default_ttl
+        self.ttls = dict(settings.CACHE_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            # Stale entries which Assembla confirmed were unchanged
+            'revalidated': 0,
+            # Stale entries which had to be downloaded again
+            'refetched': 0,
+            # Entries removed because their data changed, see `delete_prefix`
+            'invalidated': 0,
+        }
+        self.stats_lock = threading.Lock()
+
+    def increment(self, stat, amount=1):
+        with self.stats_lock:
+            self.stats[stat] += amount
+
+    def ttl_for(self, model):
+        """
+        The number of seconds that responses for `model` are fresh for
+        """
+        return self.ttls.get(model.__name__, self.default_ttl)
+
+    def get(self, key):
+        """
+        Returns the value stored against `key`, or None if it is missing or stale
+        """
+        entry = self.get_entry(key)
+        if entry is not None and entry.is_fresh():
+            return entry.value
+
+    def get_entry(self, key):
+        """
+        Returns the CacheEntry stored against `key`, even if it is stale,
+        or None if it is missing
+        """
+        raise NotImplementedError()
+
+    def set(self, key, value, ttl=None, etag=None, last_modified=None):
+        raise NotImplementedError()
+
+    def delete(self, key):
+        raise NotImplementedError()
+
+    def delete_prefix(self, prefix):
+        """
+        Removes every entry whose key starts with `prefix`, returning the
+        number removed
+        """
+        raise NotImplementedError()
+
+    def clear(self):
+        raise NotImplementedError()
+
+
+class LRUCache(BaseCache):
+    """
+    An in-memory cache which holds at most `max_entries` values, evicting
+    the least recently used entries once it is full
+    """
+    def __init__(self, max_entries=None, default_ttl=None, ttls=None):
+        super(LRUCache, self).__init__(default_ttl=default_ttl, ttls=ttls)
+        self.max_entries = settings.CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.entries = OrderedDict()
+        # Pages may be fetched concurrently, see `API.page_workers`
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get_entry(self, key):
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                # Re-insert the entry to mark it as the most recently used.
+                # Stale entries are kept, so that they can be revalidated
+                self.entries[key] = entry
+        self.increment('hits' if entry is not None and entry.is_fresh() else 'misses')
+        return entry
+
+    def set(self, key, value, ttl=None, etag=None, last_modified=None):
+        if ttl is None:
+            ttl = self.default_ttl
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = CacheEntry(value, time.time() + ttl, etag, last_modified)
+            evictions = 0
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                evictions += 1
+        if evictions:
+            self.increment('evictions', evictions)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def delete_prefix(self, prefix):
+        with self.lock:
+            keys = [key for key in self.entries if key.startswith(prefix)]
+            for key in keys:
+                del self.entries[key]
+        if keys:
+            self.increment('invalidated', len(keys))
+        return len(keys)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class SQLiteConnection(object):
+    """
+    Gives each thread and process its own connection to the SQLite database
+    at `self.path`, as connections cannot be shared across threads or forked
+    processes. Classes using it set `self.local` to a `threading.local()`
+    """
+    @property
+    def connection(self):
+        if getattr(self.local, 'pid', None) != os.getpid():
+            self.local.connection = sqlite3.connect(self.path, timeout=self.timeout)
+            # Write-ahead logging allows readers to continue while another process writes
+            self.local.connection.execute('PRAGMA journal_mode=WAL')
+            self.local.pid = os.getpid()
+        return self.local.connection
+
+
+class SQLiteCache(SQLiteConnection, BaseCache):
+    """
+    A cache which persists responses to an SQLite database on disk, so that
+    they survive restarts and can be shared by multiple worker processes
+    """
+    def __init__(self, path, max_entries=None, default_ttl=None, ttls=None, timeout=30):
+        """
+        :path
+            The file to store the cache in, created if it does not exist
+        :max_entries
+            The number of entries to retain when the cache is compacted
+        :timeout
+            Seconds to wait for other processes to release the database
+        """
+        super(SQLiteCache, self).__init__(default_ttl=default_ttl, ttls=ttls)
+        self.path = path
+        self.max_entries = settings.CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.timeout = timeout
+        self.local = threading.local()
+        with self.connection as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, value TEXT, expires REAL, etag TEXT, last_modified TEXT'
+                ')'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires)')
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def get_entry(self, key):
+        row = self.connection.execute(
+            'SELECT value, expires, etag, last_modified FROM entries WHERE key = ?', (key,)
+        ).fetchone()
+        entry = None
+        if row is not None:
+            entry = CacheEntry(json.loads(row[0]), *row[1:])
+        self.increment('hits' if entry is not None and entry.is_fresh() else 'misses')
+        return entry
+
+    def set(self, key, value, ttl=None, etag=None, last_modified=None):
+        if ttl is None:
+            ttl = self.default_ttl
+        with self.connection as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)',
+                (key, json.dumps(value), time.time() + ttl, etag, last_modified)
+            )
+
+    def delete(self, key):
+        with self.connection as connection:
+            connection.execute('DELETE FROM entries WHERE key = ?', (key,))
+
+    def delete_prefix(self, prefix):
+        with self.connection as connection:
+            # Compared with substr, as LIKE treats the underscores in paths as wildcards
+            deleted = connection.execute(
+                'DELETE FROM entries WHERE substr(key, 1, ?) = ?', (len(prefix), prefix)
+            ).rowcount
+        if deleted > 0:
+            self.increment('invalidated', deleted)
+        return max(deleted, 0)
+
+    def clear(self):
+        with self.connection as connection:
+            connection.execute('DELETE FROM entries')
+
+    def compact(self, max_stale=None):
+        """
+        Removes entries which have been stale for longer than `max_stale`
+        seconds, then evicts the entries closest to expiry until at most
+        `max_entries` remain, and finally reclaims the space on disk
+        """
+        if max_stale is None:
+            max_stale = settings.CACHE_MAX_STALE
+        with self.connection as connection:
+            connection.execute('DELETE FROM entries WHERE expires < ?', (time.time() - max_stale,))
+            evictions = connection.execute(
+                'DELETE FROM entries WHERE key IN ('
+                'SELECT key FROM entries ORDER BY expires DESC LIMIT -1 OFFSET ?'
+                ')',
+                (self.max_entries,)
+            ).rowcount
+        self.connection.execute('VACUUM')
+        if evictions > 0:
+            self.increment('evictions', evictions)
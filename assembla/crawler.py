@@ -0,0 +1,136 @@
+import threading
+import Queue
+from collections import deque, namedtuple
+import settings
+
+
+class CrawlResult(namedtuple('CrawlResult', ('space', 'endpoint', 'objects', 'error'))):
+    """
+    The outcome of calling one endpoint of one space. `error` is the
+    exception raised by the call, or None if it succeeded
+    """
+
+
+class SpaceQueue(object):
+    """
+    The endpoints which remain to be called for a space
+    """
+    def __init__(self, space, endpoints):
+        self.space = space
+        self.endpoints = deque(endpoints)
+        self.in_flight = 0
+
+
+class Crawler(object):
+    """
+    Calls a set of endpoints (eg: `Space.tickets`) on many spaces at once,
+    so that account-wide jobs do not have to visit the spaces one by one.
+
+    Calls are shared between a pool of worker threads. Work is handed out
+    to the spaces in turn, and each space is limited in the number of calls
+    it may have in flight, so that a few large spaces cannot starve the rest.
+    """
+    def __init__(self, api, endpoints=None, workers=None, per_space=None):
+        """
+        :api
+            The API instance to crawl
+        :endpoints
+            The names of the Space methods to call, eg: ('tickets', 'users').
+            Defaults to `settings.CRAWLER_ENDPOINTS`
+        :workers
+            The number of calls in flight at once, across every space.
+            Defaults to `settings.CRAWLER_WORKERS`
+        :per_space
+            The number of calls in flight at once for a single space.
+            Defaults to `settings.CRAWLER_PER_SPACE`
+        """
+        self.api = api
+        self.endpoints = endpoints or settings.CRAWLER_ENDPOINTS
+        self.workers = workers or settings.CRAWLER_WORKERS
+        self.per_space = per_space or settings.CRAWLER_PER_SPACE
+
+    def crawl(self, callback, spaces=None):
+        """
+        Calls `callback` with each CrawlResult as it arrives, returning
+        the results which failed
+        """
+        failures = []
+        for result in self.iter_results(spaces):
+            if result.error is not None:
+                failures.append(result)
+            callback(result)
+        return failures
+
+    def iter_results(self, spaces=None):
+        """
+        Yields a CrawlResult for each endpoint of each space, in the order
+        that they complete. Defaults to every space available to the API
+        """
+        if spaces is None:
+            spaces = self.api.spaces()
+
+        queues = deque(SpaceQueue(space, self.endpoints) for space in spaces)
+        condition = threading.Condition()
+        results = Queue.Queue()
+        # Set once the caller stops consuming results
+        stopped = []
+
+        def next_call():
+            """
+            Blocks until a call may be made, returning the SpaceQueue and the
+            endpoint to call, or None once every call has been handed out
+            """
+            with condition:
+                while queues and not stopped:
+                    for _ in xrange(len(queues)):
+                        queue = queues[0]
+                        # Visit the spaces in turn
+                        queues.rotate(-1)
+                        if queue.in_flight < self.per_space:
+                            endpoint = queue.endpoints.popleft()
+                            queue.in_flight += 1
+                            if not queue.endpoints:
+                                queues.remove(queue)
+                            return queue, endpoint
+                    # Every space with work remaining is at its limit
+                    condition.wait()
+
+        def work():
+            try:
+                while True:
+                    call = next_call()
+                    if call is None:
+                        return
+                    queue, endpoint = call
+                    try:
+                        objects = getattr(queue.space, endpoint)()
+                        results.put(CrawlResult(queue.space, endpoint, objects, None))
+                    except Exception as e:
+                        results.put(CrawlResult(queue.space, endpoint, None, e))
+                    finally:
+                        with condition:
+                            queue.in_flight -= 1
+                            condition.notify_all()
+            finally:
+                # Signal that the worker has finished
+                results.put(None)
+
+        calls = len(queues) * len(self.endpoints)
+        threads = [threading.Thread(target=work) for _ in xrange(min(self.workers, calls))]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        try:
+            running = len(threads)
+            while running:
+                result = results.get()
+                if result is None:
+                    running -= 1
+                else:
+                    yield result
+        finally:
+            # Stop handing out calls if the caller gave up early
+            with condition:
+                stopped.append(True)
+                condition.notify_all()
@@ -0,0 +1,236 @@
+"""
+Streams the contents of spaces to newline delimited JSON files, for backups.
+
+Each resource is written as pages of results arrive, so memory use does not
+grow with the size of the space. The progress of an export is recorded after
+every page, so an interrupted export can be resumed from the last page which
+was completely written.
+
+    from assembla.export import export_space
+
+    export_space(space, 'backups/my-space', compression='gzip')
+"""
+import os
+import json
+import zlib
+import settings
+from assembla.api import APIError, Ticket, TicketComment, Milestone, WikiPage
+
+
+# Resource name -> (model, path relative to the space, parameters)
+RESOURCES = {
+    # Sorted, so that an interrupted export resumes from the right page
+    'tickets': (Ticket, 'tickets', {'report': 0, 'sort_by': 'number', 'sort_order': 'asc'}),
+    'milestones': (Milestone, 'milestones/all', {}),
+    'wiki_pages': (WikiPage, 'wiki_pages', {}),
+    # Fetched for each ticket in turn, see `SpaceExporter.export_comments`
+    'ticket_comments': (TicketComment, 'tickets/%s/ticket_comments', {}),
+}
+
+COMPRESSIONS = {
+    None: '.ndjson',
+    'gzip': '.ndjson.gz',
+    'zstd': '.ndjson.zst',
+}
+
+# The file which records the progress of an export
+STATE_FILENAME = 'export.json'
+
+
+class SpaceExporter(object):
+    """
+    Exports the resources of a single space to a directory, writing one
+    file per resource and recording its progress in `export.json`
+    """
+    def __init__(self, space, directory, compression=None, resume=True):
+        """
+        :space
+            The Space to export
+        :directory
+            The directory to write to, created if it does not exist
+        :compression
+            None, 'gzip' or 'zstd'. zstd requires the `zstandard` package
+        :resume
+            Continue an interrupted export in `directory`, rather than
+            starting again
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError('Unknown compression: {0}'.format(compression))
+        self.space = space
+        self.api = space.api
+        self.directory = directory
+        self.compression = compression
+        if compression == 'zstd':
+            import zstandard
+            self.zstd = zstandard.ZstdCompressor()
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        # Resource name -> the number of units (pages, or tickets for
+        # comments) written, the file's size after them, whether the
+        # resource is complete, and whether the space does not offer it
+        self.state = {}
+        if resume and os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                self.state = json.load(f)
+            if self.state.get('compression', compression) != compression:
+                raise ValueError(
+                    'The export in {0} was not written with {1} compression'.format(directory, compression)
+                )
+        self.state['compression'] = compression
+
+    @property
+    def state_path(self):
+        return os.path.join(self.directory, STATE_FILENAME)
+
+    def path(self, resource):
+        return os.path.join(self.directory, resource + COMPRESSIONS[self.compression])
+
+    def export(self, resources=None):
+        """
+        Exports each of `resources`, defaulting to every resource in `RESOURCES`.
+        Returns a dictionary mapping each resource to the number of objects
+        written, or to None if the space does not offer the resource
+        """
+        counts = {}
+        for resource in resources or sorted(RESOURCES):
+            if resource == 'ticket_comments':
+                counts[resource] = self.export_comments()
+            else:
+                counts[resource] = self.export_resource(resource)
+        return counts
+
+    def export_resource(self, resource):
+        """
+        Writes every object of `resource` to its file, page by page. If the
+        space does not offer the resource, such as wiki pages when the space
+        has no wiki, it is recorded as unavailable and None is returned
+        """
+        progress = self._start(resource)
+        if progress['complete']:
+            return None if progress.get('unavailable') else 0
+
+        model, rel_path, params = RESOURCES[resource]
+        params = dict(params, per_page=settings.MAX_PER_PAGE, page=progress['units'] + 1)
+
+        count = 0
+        with open(self.path(resource), 'ab') as f:
+            for json_response in self._iter_listing(progress, model, rel_path, params):
+                count += len(json_response)
+                self._write(f, resource, json_response)
+        self._finish(resource)
+        return None if progress.get('unavailable') else count
+
+    def export_comments(self):
+        """
+        Writes the comments of every ticket, writing the comments of each
+        page of tickets as one unit. Returns None if the space has no tickets
+        """
+        resource = 'ticket_comments'
+        progress = self._start(resource)
+        if progress['complete']:
+            return None if progress.get('unavailable') else 0
+
+        model, rel_path, params = RESOURCES[resource]
+        params = dict(params, per_page=settings.MAX_PER_PAGE)
+        ticket_model, tickets_path, ticket_params = RESOURCES['tickets']
+        ticket_params = dict(ticket_params, per_page=settings.MAX_PER_PAGE, page=progress['units'] + 1)
+
+        count = 0
+        with open(self.path(resource), 'ab') as f:
+            tickets = self._iter_listing(progress, ticket_model, tickets_path, ticket_params)
+            for json_response in tickets:
+                comments = []
+                for ticket in json_response:
+                    pages = self.api._iter_pages(
+                        model,
+                        space=self.space,
+                        rel_path=self.space._build_rel_path(rel_path % ticket['number']),
+                        extra_params=params,
+                        get_all=True,
+                    )
+                    for comments_response in pages:
+                        comments.extend(comments_response)
+                count += len(comments)
+                self._write(f, resource, comments)
+        self._finish(resource)
+        return None if progress.get('unavailable') else count
+
+    def _iter_listing(self, progress, model, rel_path, params):
+        """
+        Yields the pages of a listing of the space. If the listing is not
+        found, its resource is recorded as unavailable and nothing is yielded
+        """
+        pages = self.api._iter_pages(
+            model,
+            space=self.space,
+            rel_path=self.space._build_rel_path(rel_path),
+            extra_params=params,
+            get_all=True,
+        )
+        try:
+            for json_response in pages:
+                yield json_response
+        except APIError as e:
+            # Only the listing itself can be missing, not a later page of it
+            if e.status_code != 404 or progress['units']:
+                raise
+            progress['unavailable'] = True
+
+    def _start(self, resource):
+        """
+        Returns the progress of `resource`, discarding anything written
+        to its file after the last completed unit
+        """
+        progress = self.state.setdefault(resource, {'units': 0, 'offset': 0, 'complete': False})
+        with open(self.path(resource), 'ab') as f:
+            f.truncate(progress['offset'])
+        return progress
+
+    def _write(self, f, resource, objects):
+        """
+        Appends `objects` to the file as one unit, then records the progress
+        """
+        lines = []
+        for obj in objects:
+            line = self.api.serializer.dumps(obj)
+            if not isinstance(line, bytes):
+                line = line.encode('utf-8')
+            lines.append(line)
+        content = b''.join(line + b'\n' for line in lines)
+
+        # Each unit is compressed separately, as a complete gzip member or
+        # zstd frame, so that the file can be truncated between units
+        if self.compression == 'gzip':
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            content = compressor.compress(content) + compressor.flush()
+        elif self.compression == 'zstd':
+            content = self.zstd.compress(content)
+
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+
+        progress = self.state[resource]
+        progress['units'] += 1
+        progress['offset'] = f.tell()
+        self._save()
+
+    def _finish(self, resource):
+        self.state[resource]['complete'] = True
+        self._save()
+
+    def _save(self):
+        # Replace the file, so that it is never left half written
+        path = self.state_path + '.tmp'
+        with open(path, 'w') as f:
+            json.dump(self.state, f)
+        os.rename(path, self.state_path)
+
+
+def export_space(space, directory, compression=None, resources=None, resume=True):
+    """
+    Exports `resources` of `space` to `directory`, see `SpaceExporter`
+    """
+    return SpaceExporter(space, directory, compression=compression, resume=resume).export(resources)
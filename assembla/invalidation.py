@@ -0,0 +1,99 @@
+"""
+Keeps the response cache of a long running process fresh, by following the
+activity stream and removing only the cached responses which each Event
+may have made out of date. Everything else stays cached for as long as its
+TTL allows.
+
+    from assembla.invalidation import CacheInvalidator
+
+    assembla.cache_responses = True
+    invalidator = CacheInvalidator(assembla)
+    invalidator.start()
+    ...
+    invalidator.stop()
+"""
+import threading
+import settings
+
+
+class CacheInvalidator(object):
+    """
+    Follows the activity stream of an API instance in a background thread,
+    invalidating its cache as events arrive
+    """
+    def __init__(self, api, since=None, processed=None, min_interval=None, max_interval=None):
+        """
+        :api
+            The API instance whose cache is kept fresh
+        :since
+            The `date` of the latest event already accounted for, see
+            `API.stream_follow`
+        :processed
+            The keys of the events dated `since` already accounted for, see
+            `API.stream_follow`
+        :min_interval,
+        :max_interval
+            The shortest and longest number of seconds to wait between polls,
+            see `API.stream_follow`
+        """
+        self.api = api
+        # The date of the latest event processed
+        self.cursor = since
+        # The keys of the events processed which are dated `cursor`, so
+        # that a restarted stream skips only those events of that date
+        self.processed = set(processed or ())
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.stats = {
+            'events': 0,
+            'invalidated': 0,
+            # Polls of the activity stream which failed
+            'errors': 0,
+        }
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def process(self, event):
+        """
+        Invalidates the cached responses affected by `event`
+        """
+        self.stats['events'] += 1
+        self.stats['invalidated'] += self.api.invalidate_event(event)
+        date = event.get('date')
+        if date:
+            # Events arrive oldest first
+            if date != self.cursor:
+                self.cursor = date
+                self.processed = set()
+            self.processed.add(event.key)
+
+    def run(self):
+        while not self.stopped.is_set():
+            events = self.api.stream_follow(
+                since=self.cursor,
+                processed=list(self.processed),
+                min_interval=self.min_interval,
+                max_interval=self.max_interval,
+                stop=self.stopped,
+            )
+            try:
+                for event in events:
+                    self.process(event)
+            except Exception:
+                # Resume from the last event processed once Assembla recovers
+                self.stats['errors'] += 1
+                self.stopped.wait(
+                    settings.STREAM_MAX_INTERVAL if self.max_interval is None else self.max_interval
+                )
@@ -1,45 +1,523 @@
+import copy
+import weakref
 from functools import wraps
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
+
+
+class Schema(object):
+    """
+    An ordered set of field names, shared by every CompactData with those fields
+    """
+    __slots__ = ('fields', 'positions')
+
+    # Field names -> Schema
+    interned = {}
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.positions = dict((field, position) for position, field in enumerate(fields))
+
+    @classmethod
+    def intern(cls, fields):
+        schema = cls.interned.get(fields, None)
+        if schema is None:
+            schema = cls.interned.setdefault(fields, cls(fields))
+        return schema
+
+
+class CompactData(object):
+    """
+    A memory efficient, dictionary-like container for an object's data. The
+    field names are held once in a shared Schema, and each object only stores
+    a tuple of its values.
+    """
+    __slots__ = ('schema', 'row')
+
+    def __init__(self, data=None):
+        data = data or {}
+        self.schema = Schema.intern(tuple(data))
+        self.row = tuple(data[field] for field in self.schema.fields)
+
+    def __getitem__(self, key):
+        return self.row[self.schema.positions[key]]
+
+    def __setitem__(self, key, value):
+        position = self.schema.positions.get(key, None)
+        if position is None:
+            self.schema = Schema.intern(self.schema.fields + (key,))
+            self.row += (value,)
+        else:
+            values = list(self.row)
+            values[position] = value
+            self.row = tuple(values)
+
+    def __delitem__(self, key):
+        position = self.schema.positions[key]
+        self.schema = Schema.intern(self.schema.fields[:position] + self.schema.fields[position + 1:])
+        self.row = self.row[:position] + self.row[position + 1:]
+
+    def __contains__(self, key):
+        return key in self.schema.positions
+
+    def __iter__(self):
+        return iter(self.schema.fields)
+
+    def __len__(self):
+        return len(self.row)
+
+    def __eq__(self, other):
+        if isinstance(other, (CompactData, dict)):
+            return dict(self) == dict(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def get(self, key, default=None):
+        position = self.schema.positions.get(key, None)
+        if position is None:
+            return default
+        return self.row[position]
+
+    def keys(self):
+        return list(self.schema.fields)
+
+    def values(self):
+        return list(self.row)
+
+    def items(self):
+        return zip(self.schema.fields, self.row)
+
+    def copy(self):
+        # Rows are immutable, so the copy can share them
+        data = CompactData.__new__(CompactData)
+        data.schema = self.schema
+        data.row = self.row
+        return data
+
+
+# Values which may be changed in place, eg: `custom_fields`
+CONTAINER_TYPES = (dict, list)
 
 
 class AssemblaObject(object):
     """
     Proxies getitem calls (eg: `instance['id']`) to a dictionary `instance.data['id']`.
+
+    An instance shares the data it was created with (eg: a page of results
+    held by the response cache) until it is first modified, at which point it
+    takes a copy. Nested values, such as `custom_fields`, are copied as soon
+    as they are accessed, as they may be changed in place. The fields modified
+    since the data was retrieved are tracked, so that only they need to be
+    sent back to Assembla.
     """
-    def __init__(self, data={}):
-        self.data = data
+    # Instances only allocate a `__dict__` if attributes other than
+    # these are set, which keeps large listings small in memory
+    __slots__ = ('_data', '_owned', '_dirty', '_original', '_watchers', 'api', 'space', '__dict__')
+
+    def __init__(self, data=None):
+        self._data = data if data is not None else {}
+        self._owned = data is None
+        # The names of the modified fields, or None if every field
+        # should be treated as modified
+        self._dirty = None
+        # The data as it was before it was copied, which nested values
+        # are compared against to find those changed in place
+        self._original = None
+        # Weak references to the collections which have indexed the instance
+        self._watchers = None
+
+    @property
+    def data(self):
+        """
+        The instance's data. As the returned dictionary may be changed
+        directly, every field is considered to be modified
+        """
+        self._own()
+        self._dirty = None
+        self._modified()
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._modified()
+        self._data = value
+        self._owned = False
+        self._dirty = None
+        self._original = None
+
+    def _own(self):
+        """
+        Replaces shared data with a copy, before it is modified
+        """
+        if not self._owned:
+            self._original = self._data
+            data = self._data.copy()
+            for key, value in data.items():
+                if isinstance(value, CONTAINER_TYPES):
+                    data[key] = copy.deepcopy(value)
+            self._data = data
+            self._owned = True
+
+    def _watch(self, collection_ref):
+        """
+        Notifies the referenced collection whenever the instance is modified
+        """
+        watchers = self._watchers or ()
+        if collection_ref not in watchers:
+            self._watchers = tuple(ref for ref in watchers if ref() is not None) + (collection_ref,)
+
+    def _modified(self, field=None):
+        """
+        Discards the indexes of `field`, or of every field if None, held by
+        the collections which have indexed the instance
+        """
+        for ref in self._watchers or ():
+            collection = ref()
+            if collection is not None:
+                collection._discard_index(field)
+
+    @property
+    def dirty(self):
+        """
+        The names of the fields modified since the data was retrieved
+        """
+        if self._dirty is None:
+            return set(self._data)
+        dirty = set(self._dirty)
+        if self._original is not None:
+            # Nested values which were changed in place
+            for key, value in self._data.items():
+                if isinstance(value, CONTAINER_TYPES) and value != self._original.get(key):
+                    dirty.add(key)
+        return dirty
+
+    def changes(self):
+        """
+        A dictionary of the modified fields and their values
+        """
+        return dict((field, self._data[field]) for field in self.dirty if field in self._data)
+
+    def mark_clean(self):
+        """
+        Stops treating the instance's fields as modified, eg: once they
+        have been written to Assembla
+        """
+        self._dirty = ()
+        # Treat the current data as the original, so that nested values
+        # are copied again before they can next be changed
+        self._original = None
+        self._owned = False
+
+    def __getstate__(self):
+        state = dict(getattr(self, '__dict__', {}))
+        # Collections are not pickled with the instance, so are not watchers
+        for name in ('_data', '_owned', '_dirty', '_original', 'api', 'space'):
+            if hasattr(self, name):
+                state[name] = getattr(self, name)
+        return state
+
+    def __setstate__(self, state):
+        self._original = None
+        self._watchers = None
+        for name, value in state.items():
+            setattr(self, name, value)
 
     def __getitem__(self, key):
-        return self.data[key]
+        value = self._data[key]
+        if isinstance(value, CONTAINER_TYPES) and not self._owned:
+            # The value may be changed in place, so it must not be shared
+            self._own()
+            value = self._data[key]
+        return value
 
     def __setitem__(self, key, value):
-        self.data[key] = value
+        self._own()
+        self._data[key] = value
+        self._modified(key)
+        if self._dirty is not None:
+            if not self._dirty:
+                self._dirty = set()
+            self._dirty.add(key)
+
+    def __contains__(self, key):
+        return key in self._data
 
     def keys(self):
-        return self.data.keys()
+        return self._data.keys()
 
     def values(self):
-        return self.data.values()
+        return self._data.values()
+
+    def items(self):
+        return self._data.items()
 
-    def get(self, *args, **kwargs):
-        return self.data.get(*args, **kwargs)
+    def get(self, key, default=None):
+        if key in self._data:
+            return self[key]
+        return default
 
     def __repr__(self):
         # Most objects
         for field in ('menu_name', 'page_name', 'name',):
-            if field in self.data:
-                return '<%s: %s>' % (type(self).__name__, self.data[field])
+            if field in self._data:
+                return '<%s: %s>' % (type(self).__name__, self._data[field])
 
         # Tickets
-        if ('number' in self.data) and ('summary' in self.data):
-            return "<%s: #%s - %s>" % (type(self).__name__, self.data['number'], self.data['summary'])
+        if ('number' in self._data) and ('summary' in self._data):
+            return "<%s: #%s - %s>" % (type(self).__name__, self._data['number'], self._data['summary'])
 
         # Ticket Comments
-        if 'id' in self.data:
-            return "<%s: #%s>" % (type(self).__name__, self.data['id'])
+        if 'id' in self._data:
+            return "<%s: #%s>" % (type(self).__name__, self._data['id'])
 
         return super(AssemblaObject, self).__repr__()
 
 
+class AssemblaCollection(Sequence):
+    """
+    A sequence of AssemblaObjects which can be filtered repeatedly without
+    returning to the API.
+
+    The first time that a field is filtered on, a hash index mapping each of
+    the field's values to the matching objects is built, so that subsequent
+    filters only need to visit the objects that match. Modifying a field of
+    one of the collection's objects discards the collection's index of that
+    field.
+
+    Collections created by `AssemblaCollection.lazy` hold the decoded JSON of
+    each object and only instantiate an object when it is first accessed.
+    Counting, slicing and filtering work against the decoded JSON, so large
+    listings can be narrowed down without instantiating every object.
+    """
+    def __init__(self, objects=None):
+        # The decoded JSON or instances of each object
+        self.records = list(objects) if objects is not None else []
+        # A function which instantiates an object from its record,
+        # or None if the records are already instances
+        self.build = None
+        # The instances built so far, which are shared with any
+        # collections sliced or filtered from this one
+        self.built = None
+        # The positions of this collection's objects within `records`,
+        # or None if it holds every record
+        self.positions = None
+        # Field name -> value -> positions of the matching objects
+        self.indexes = {}
+        # Handed to the objects which are indexed, so that they can discard
+        # the indexes when modified without keeping the collection alive
+        self.ref = weakref.ref(self)
+        # Lazy collections only: references to every collection, sharing
+        # `built`, which has been indexed. Objects instantiated later are
+        # watched by all of them
+        self.watchers = None
+
+    @classmethod
+    def lazy(cls, records, build):
+        """
+        Returns a collection of the objects that `build` instantiates
+        from each of `records`, once they are accessed
+        """
+        collection = cls()
+        collection.records = records
+        collection.build = build
+        collection.built = [None] * len(records)
+        collection.watchers = []
+        return collection
+
+    @property
+    def objects(self):
+        """
+        A list of every object, instantiating any which have not been
+        """
+        return list(self)
+
+    def _record(self, position):
+        """
+        The object at `position` if it has been instantiated, otherwise its record
+        """
+        if self.positions is not None:
+            position = self.positions[position]
+        obj = self.built[position] if self.build is not None else None
+        return obj if obj is not None else self.records[position]
+
+    def _select(self, positions):
+        """
+        Returns a collection of the objects at `positions`
+        """
+        if self.build is None:
+            return type(self)(self.records[position] for position in positions)
+        collection = type(self)()
+        collection.records = self.records
+        collection.build = self.build
+        collection.built = self.built
+        collection.watchers = self.watchers
+        if self.positions is not None:
+            collection.positions = [self.positions[position] for position in positions]
+        else:
+            collection.positions = list(positions)
+        return collection
+
+    def __len__(self):
+        if self.positions is not None:
+            return len(self.positions)
+        return len(self.records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._select(xrange(*index.indices(len(self))))
+        if self.build is None:
+            return self.records[index]
+        if self.positions is not None:
+            index = self.positions[index]
+        obj = self.built[index]
+        if obj is None:
+            obj = self.build(self.records[index])
+            for ref in self.watchers:
+                obj._watch(ref)
+            self.built[index] = obj
+        return obj
+
+    def __iter__(self):
+        if self.build is None:
+            return iter(self.records)
+        return (self[position] for position in xrange(len(self)))
+
+    def __add__(self, other):
+        return type(self)(self.objects + list(other))
+
+    def __radd__(self, other):
+        return type(self)(list(other) + self.objects)
+
+    def __eq__(self, other):
+        if isinstance(other, (AssemblaCollection, list)):
+            return self.objects == list(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __repr__(self):
+        return repr(self.objects)
+
+    def __getstate__(self):
+        # Weak references cannot be pickled, and the unpickled objects
+        # would not know to discard the indexes
+        state = dict(self.__dict__)
+        del state['ref']
+        state['indexes'] = {}
+        if self.watchers is not None:
+            state['watchers'] = []
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.ref = weakref.ref(self)
+
+    def _discard_index(self, field=None):
+        """
+        Discards the index of `field`, or every index if None
+        """
+        if field is None:
+            self.indexes = {}
+        else:
+            self.indexes.pop(field, None)
+
+    def index(self, field):
+        """
+        Returns the hash index for `field`, building it if necessary. Returns
+        None if the field holds values which cannot be hashed
+        """
+        index = self.indexes.get(field, False)
+        if index is False:
+            if self.watchers is not None and self.ref not in self.watchers:
+                self.watchers.append(self.ref)
+            index = {}
+            try:
+                for position in xrange(len(self)):
+                    record = self._record(position)
+                    if isinstance(record, AssemblaObject):
+                        record._watch(self.ref)
+                    index.setdefault(record.get(field), []).append(position)
+            except TypeError:  # An unhashable value, eg: `custom_fields`
+                index = None
+            self.indexes[field] = index
+        return index
+
+    def filter(self, **kwargs):
+        """
+        Returns a collection of the objects which possess attributes
+        equal in name/value to every key/value in kwargs
+        """
+        if not kwargs:
+            return self[:]
+
+        # Consult the indexes which have already been built. If there are
+        # none, build one for a single field rather than for all of them
+        fields = [field for field in kwargs if self.indexes.get(field) is not None]
+        if not fields:
+            for field in sorted(kwargs):
+                if self.index(field) is not None:
+                    fields = [field]
+                    break
+
+        # Find the smallest set of candidates offered by an index
+        candidates = None
+        for field in fields:
+            index = self.indexes.get(field, None)
+            if index is None:  # Discarded by a modification in the meantime
+                continue
+            try:
+                positions = index.get(kwargs[field], [])
+            except TypeError:  # An unhashable value
+                continue
+            if candidates is None or len(positions) < len(candidates):
+                candidates = positions
+
+        if candidates is None:
+            candidates = xrange(len(self))
+
+        # Check the candidates against the remaining fields
+        return self._select(
+            position for position in candidates
+            if all(
+                self._record(position).get(field) == value
+                for field, value in kwargs.iteritems()
+            )
+        )
+
+
+class BulkResult(object):
+    """
+    The outcome of a bulk operation, such as `Space.write_tickets`
+    """
+    def __init__(self):
+        # (submitted object, object returned by Assembla) pairs
+        self.successes = []
+        # (submitted object, exception raised) pairs
+        self.failures = []
+
+    @property
+    def instances(self):
+        """
+        The objects returned by Assembla for each successful operation
+        """
+        return [returned for submitted, returned in self.successes]
+
+    def __repr__(self):
+        return '<%s: %s succeeded, %s failed>' % (
+            type(self).__name__, len(self.successes), len(self.failures)
+        )
+
+
 def assembla_filter(func):
     """
     Filters :data for the objects in it which possess attributes equal in
@@ -52,25 +530,14 @@ def assembla_filter(func):
     def wrapper(class_instance, **kwargs):
 
         # Get the result
-        extra_params = kwargs.get('extra_params', None)
-        if extra_params:
-            del kwargs['extra_params']
+        extra_params = kwargs.pop('extra_params', None)
         results = func(class_instance, extra_params)
 
         # Filter the result
         if kwargs:
-            results = filter(
-                # Find the objects who have an equal number of matching attr/value
-                # combinations as `len(kwargs)`
-                lambda obj: len(kwargs) == len(
-                    filter(
-                        lambda boolean: boolean,
-                        [obj.get(attr_name) == value
-                            for attr_name, value in kwargs.iteritems()]
-                    )
-                ),
-                results
-            )
+            if not isinstance(results, AssemblaCollection):
+                results = AssemblaCollection(results)
+            results = results.filter(**kwargs)
 
         return results
     return wrapper
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""
+Collects timings and counts of the requests made by an API instance, so that
+slow endpoints can be found and Assembla's latency monitored.
+
+    from assembla.metrics import MetricsCollector
+
+    metrics = MetricsCollector()
+    metrics.install(assembla)
+    ...
+    print json.dumps(metrics.snapshot(), indent=2)
+"""
+import re
+import threading
+import urlparse
+import settings
+
+
+def endpoint_name(method, path):
+    """
+    Groups requests by the endpoint they were sent to, by replacing the
+    ids in their path. Eg: 'GET spaces/:space/tickets/:id/ticket_comments'
+    """
+    path = urlparse.urlparse(path).path.strip('/')
+    if path.startswith(settings.API_VERSION + '/'):
+        path = path[len(settings.API_VERSION) + 1:]
+    path = re.sub(r'\.json$', '', path)
+    segments = path.split('/')
+    for i, segment in enumerate(segments):
+        if i > 0 and segments[i - 1] == 'spaces':
+            segments[i] = ':space'
+        elif segment.isdigit():
+            segments[i] = ':id'
+    return '{0} {1}'.format(method, '/'.join(segments))
+
+
+class Histogram(object):
+    """
+    Counts observations into buckets with fixed upper bounds
+    """
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = None
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        """
+        The upper bound of the bucket holding the `q`th percentile, which
+        is the largest value observed if it falls beyond the last bucket
+        """
+        if not self.count:
+            return None
+        target = q / 100.0 * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        buckets = dict((str(bound), count) for bound, count in zip(self.buckets, self.counts))
+        buckets['+Inf'] = self.counts[-1]
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else None,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'buckets': buckets,
+        }
+
+
+class EndpointMetrics(object):
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency = Histogram(settings.METRICS_LATENCY_BUCKETS)
+        # The number of pages fetched by each listing
+        self.pages = Histogram(settings.METRICS_PAGE_BUCKETS)
+
+    def snapshot(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'latency': self.latency.snapshot(),
+            'pages': self.pages.snapshot(),
+        }
+
+
+class MetricsCollector(object):
+    """
+    Records the latency, size and outcome of each request made by the API
+    instances it is installed on, grouped by endpoint
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.apis = []
+        self.endpoints = {}
+
+    def install(self, api):
+        """
+        Starts recording the requests made by `api`
+        """
+        api.after_request.append(self.record_request)
+        api.after_listing.append(self.record_listing)
+        self.apis.append(api)
+
+    def uninstall(self, api):
+        api.after_request.remove(self.record_request)
+        api.after_listing.remove(self.record_listing)
+        self.apis.remove(api)
+
+    def endpoint(self, name):
+        metrics = self.endpoints.get(name, None)
+        if metrics is None:
+            metrics = self.endpoints[name] = EndpointMetrics()
+        return metrics
+
+    def record_request(self, method, url, response, duration, body=None):
+        with self.lock:
+            metrics = self.endpoint(endpoint_name(method, url))
+            metrics.requests += 1
+            metrics.latency.observe(duration)
+            metrics.bytes_sent += len(body or b'')
+            if response is None or response.status_code >= 400:
+                metrics.errors += 1
+            if response is not None:
+                metrics.bytes_received += len(response.content)
+
+    def record_listing(self, rel_path, pages):
+        with self.lock:
+            self.endpoint(endpoint_name('GET', rel_path)).pages.observe(pages)
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+
+    def snapshot(self):
+        """
+        A dictionary of every metric, which can be serialized as JSON
+        """
+        with self.lock:
+            endpoints = dict((name, metrics.snapshot()) for name, metrics in self.endpoints.items())
+
+        totals = {}
+        for field in ('requests', 'errors', 'bytes_sent', 'bytes_received'):
+            totals[field] = sum(metrics[field] for metrics in endpoints.values())
+
+        cache = {}
+        scheduler = {}
+        for api in self.apis:
+            for stat, value in api.cache.stats.items():
+                cache[stat] = cache.get(stat, 0) + value
+            for stat, value in api.scheduler.stats.items():
+                scheduler[stat] = scheduler.get(stat, 0) + value
+        lookups = cache.get('hits', 0) + cache.get('misses', 0)
+        cache['hit_ratio'] = float(cache['hits']) / lookups if lookups else None
+
+        return {
+            'endpoints': endpoints,
+            'totals': totals,
+            'cache': cache,
+            'scheduler': scheduler,
+        }
@@ -0,0 +1,331 @@
+"""
+A local SQLite replica of the tickets, milestones, components, users and tags
+of one or more spaces, for reports which would otherwise fetch and filter
+every ticket from Assembla each time they run. Tickets are synced
+incrementally, see `Space.sync_tickets`, and queries are answered without
+any requests to Assembla.
+
+    from assembla.replica import Replica
+
+    replica = Replica('/var/lib/assembla/replica.sqlite')
+    replica.sync(space)
+
+    replica.query('tickets', space=space, status='New', updated_at__gte='2014-01-01')
+    replica.count('tickets', space=space, by='status')
+"""
+import re
+import json
+import sqlite3
+import threading
+from assembla.api import Ticket, Milestone, Component, User, Tag
+from assembla.cache import SQLiteConnection
+from assembla.lib import AssemblaCollection
+
+
+# Resource name -> (model, the Space method which lists it, the field which
+# identifies an object within its space)
+RESOURCES = {
+    'tickets': (Ticket, 'tickets', 'number'),
+    'milestones': (Milestone, 'milestones', 'id'),
+    'components': (Component, 'components', 'id'),
+    'users': (User, 'users', 'id'),
+    'tags': (Tag, 'tags', 'id'),
+}
+
+# Filter suffix -> SQL operator, eg: `updated_at__gte='2014-01-01'`
+OPERATORS = {
+    None: '=',
+    'ne': '!=',
+    'lt': '<',
+    'lte': '<=',
+    'gt': '>',
+    'gte': '>=',
+    'in': 'IN',
+}
+
+# Fields which can be stored in a column of their own. Others, such as
+# `custom_fields`, are only available from the objects returned
+FIELD_NAME = re.compile(r'^[A-Za-z]\w*$')
+SCALAR_TYPES = (basestring, int, long, float, type(None))
+
+
+class Replica(SQLiteConnection):
+    """
+    Stores each object as JSON, alongside a column for each of its scalar
+    fields so that they can be filtered, ordered and grouped by. Columns are
+    added as new fields are seen, and indexed the first time they are
+    filtered, ordered or grouped by.
+
+    Like `assembla.sync.TicketStore`, which it can stand in for, tickets which
+    are deleted on Assembla are not removed from the replica. The other
+    resources are replaced in full on every sync.
+    """
+    def __init__(self, path, timeout=30):
+        """
+        :path
+            The file to store the replica in, created if it does not exist
+        :timeout
+            Seconds to wait for other processes to release the database
+        """
+        self.path = path
+        self.timeout = timeout
+        self.local = threading.local()
+        # Table -> the names of its field columns
+        self.columns = {}
+        # (table, field) pairs which have been indexed
+        self.indexed = set()
+        with self.connection as connection:
+            for table in RESOURCES:
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS {0} ('
+                    '_space TEXT NOT NULL, _key NOT NULL, _data TEXT, PRIMARY KEY (_space, _key)'
+                    ')'.format(table)
+                )
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS _watermarks (space TEXT PRIMARY KEY, updated_at TEXT)'
+            )
+
+    def sync(self, space, resources=None):
+        """
+        Brings the replica of `space` up to date with Assembla, returning a
+        dictionary mapping each of `resources` (defaulting to every resource
+        in `RESOURCES`) to the number of objects which changed
+        """
+        counts = {}
+        for resource in resources or sorted(RESOURCES):
+            if resource == 'tickets':
+                changed = space.sync_tickets(store=self)
+            else:
+                model, method, key = RESOURCES[resource]
+                changed = self._store(resource, space['id'], getattr(space, method)(), replace=True)
+            counts[resource] = len(changed)
+        return counts
+
+    def watermark(self, space_id):
+        """
+        The latest `updated_at` value synced from the space, or None
+        """
+        row = self.connection.execute(
+            'SELECT updated_at FROM _watermarks WHERE space = ?', (space_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def merge(self, space_id, tickets):
+        """
+        Stores `tickets` and advances the space's watermark, returning
+        the tickets which were new or differed from the stored copy
+        """
+        changed = self._store('tickets', space_id, tickets)
+        updated_at = max([ticket.get('updated_at', None) or '' for ticket in tickets] or [''])
+        if updated_at > (self.watermark(space_id) or ''):
+            with self.connection as connection:
+                connection.execute(
+                    'INSERT OR REPLACE INTO _watermarks VALUES (?, ?)', (space_id, updated_at)
+                )
+        return changed
+
+    def query(self, resource, space=None, order_by=None, limit=None, **filters):
+        """
+        Returns a collection of the stored objects which match `filters`.
+
+        :space
+            A Space or space id to limit the results to
+        :order_by
+            A field, or list of fields, to order the results by. Prefix a
+            field with '-' to order it in descending order
+        :limit
+            The maximum number of objects to return
+        :filters
+            Fields and the values that they must equal, or be compared to using
+            a suffix of '__ne', '__lt', '__lte', '__gt', '__gte' or '__in',
+            eg: `estimate__gte=2`, `status__in=['New', 'Accepted']`
+        """
+        where, params = self._where(resource, space, filters)
+        sql = 'SELECT _data FROM {0} WHERE {1}'.format(resource, where)
+
+        if order_by:
+            if isinstance(order_by, basestring):
+                order_by = [order_by]
+            terms = []
+            for field in order_by:
+                descending = field.startswith('-')
+                terms.append('{0} {1}'.format(
+                    self._column(resource, field.lstrip('-'), index=True),
+                    'DESC' if descending else 'ASC',
+                ))
+            sql += ' ORDER BY ' + ', '.join(terms)
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        model = RESOURCES[resource][0]
+        return AssemblaCollection.lazy(
+            [json.loads(row[0]) for row in self.connection.execute(sql, params)],
+            lambda data: model(data=data),
+        )
+
+    def count(self, resource, space=None, by=None, **filters):
+        """
+        The number of stored objects which match `filters`. If `by` is a
+        field, or list of fields, returns a dictionary mapping each of their
+        values (or tuples of values) to the number of objects which have them,
+        eg: `replica.count('tickets', by='status')`
+        """
+        return self._aggregate(resource, 'COUNT(*)', space, by, filters)
+
+    def total(self, resource, field, space=None, by=None, **filters):
+        """
+        The sum of `field` over the stored objects which match `filters`,
+        grouped in the same manner as `count`,
+        eg: `replica.total('tickets', 'estimate', by='milestone_id')`
+        """
+        return self._aggregate(
+            resource, 'TOTAL({0})'.format(self._column(resource, field)), space, by, filters
+        )
+
+    def _aggregate(self, resource, expression, space, by, filters):
+        where, params = self._where(resource, space, filters)
+        if by is None:
+            sql = 'SELECT {0} FROM {1} WHERE {2}'.format(expression, resource, where)
+            return self.connection.execute(sql, params).fetchone()[0]
+
+        fields = [by] if isinstance(by, basestring) else list(by)
+        columns = ', '.join(self._column(resource, field, index=True) for field in fields)
+        sql = 'SELECT {0}, {1} FROM {2} WHERE {3} GROUP BY {0}'.format(columns, expression, resource, where)
+        results = {}
+        for row in self.connection.execute(sql, params):
+            results[row[0] if len(fields) == 1 else tuple(row[:-1])] = row[-1]
+        return results
+
+    def _where(self, resource, space, filters):
+        """
+        Returns an SQL condition matching `filters`, along with its parameters
+        """
+        if resource not in RESOURCES:
+            raise ValueError('Unknown resource: {0}'.format(resource))
+        conditions = ['1']
+        params = []
+        if space is not None:
+            conditions.append('_space = ?')
+            params.append(space if isinstance(space, basestring) else space['id'])
+
+        for key, value in sorted(filters.items()):
+            field, _, suffix = key.partition('__')
+            if suffix not in OPERATORS and suffix != '':
+                raise ValueError('Unknown filter: {0}'.format(key))
+            operator = OPERATORS[suffix or None]
+            column = self._column(resource, field, index=True)
+
+            if operator == 'IN':
+                value = list(value)
+                conditions.append('{0} IN ({1})'.format(column, ', '.join('?' * len(value))))
+                params.extend(value)
+            elif value is None and operator in ('=', '!='):
+                conditions.append('{0} IS {1}NULL'.format(column, 'NOT ' if operator == '!=' else ''))
+            else:
+                conditions.append('{0} {1} ?'.format(column, operator))
+                params.append(value)
+        return ' AND '.join(conditions), params
+
+    def _column(self, resource, field, index=False):
+        """
+        The SQL expression for `field`, which is NULL if no stored object has it
+        """
+        if not FIELD_NAME.match(field):
+            raise ValueError('Invalid field: {0}'.format(field))
+        if field not in self._columns(resource):
+            return 'NULL'
+        if index and (resource, field) not in self.indexed:
+            with self.connection as connection:
+                connection.execute('CREATE INDEX IF NOT EXISTS {0}_{1} ON {0} ("{1}", _space)'.format(
+                    resource, field
+                ))
+            self.indexed.add((resource, field))
+        return '"{0}"'.format(field)
+
+    def _columns(self, resource, refresh=False):
+        if refresh or resource not in self.columns:
+            self.columns[resource] = set(
+                row[1] for row in self.connection.execute('PRAGMA table_info({0})'.format(resource))
+                if not row[1].startswith('_')
+            )
+        return self.columns[resource]
+
+    def _store(self, resource, space_id, objects, replace=False):
+        """
+        Writes `objects` to the replica, returning those which were new or
+        changed. If `replace` is set, stored objects of the space which are
+        not among `objects` are removed
+        """
+        model, method, key_field = RESOURCES[resource]
+        objects = list(objects)
+        rows = []
+        fields = set()
+        for obj in objects:
+            data = dict(obj.items())
+            row = dict(
+                (field, value) for field, value in data.items()
+                if isinstance(value, SCALAR_TYPES) and FIELD_NAME.match(field)
+            )
+            fields.update(row)
+            rows.append((obj, data[key_field], data, row))
+        self._add_columns(resource, fields)
+
+        with self.connection as connection:
+            if replace:
+                stored = dict(connection.execute(
+                    'SELECT _key, _data FROM {0} WHERE _space = ?'.format(resource), (space_id,)
+                ))
+            else:
+                # Only read the stored copies of the objects being written
+                stored = {}
+                keys = [key for obj, key, data, row in rows]
+                for start in xrange(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    stored.update(connection.execute(
+                        'SELECT _key, _data FROM {0} WHERE _space = ? AND _key IN ({1})'.format(
+                            resource, ', '.join('?' * len(chunk))
+                        ),
+                        [space_id] + chunk,
+                    ))
+            changed = []
+            # Field names -> the values of the rows which have those fields,
+            # so that rows of the same shape are inserted together
+            inserts = {}
+            for obj, key, data, row in rows:
+                previous = stored.pop(key, None)
+                if previous is not None and json.loads(previous) == data:
+                    continue
+                changed.append(obj)
+                fields = tuple(sorted(row))
+                inserts.setdefault(fields, []).append(
+                    [space_id, key, json.dumps(data)] + [row[field] for field in fields]
+                )
+            for fields, values in inserts.items():
+                columns = ['_space', '_key', '_data'] + ['"{0}"'.format(field) for field in fields]
+                connection.executemany(
+                    'INSERT OR REPLACE INTO {0} ({1}) VALUES ({2})'.format(
+                        resource, ', '.join(columns), ', '.join('?' * len(columns))
+                    ),
+                    values,
+                )
+            if replace and stored:
+                connection.executemany(
+                    'DELETE FROM {0} WHERE _space = ? AND _key = ?'.format(resource),
+                    [(space_id, key) for key in stored],
+                )
+                changed.extend(model(data=json.loads(data)) for data in stored.values())
+        return changed
+
+    def _add_columns(self, resource, fields):
+        missing = fields - self._columns(resource)
+        if not missing:
+            return
+        with self.connection as connection:
+            for field in sorted(missing):
+                try:
+                    connection.execute('ALTER TABLE {0} ADD COLUMN "{1}"'.format(resource, field))
+                except sqlite3.OperationalError:
+                    # Added by another process in the meantime
+                    pass
+        self._columns(resource, refresh=True)
@@ -0,0 +1,162 @@
+import time
+import random
+import threading
+from email.utils import parsedate_tz, mktime_tz
+import requests
+import settings
+
+
+class RequestScheduler(object):
+    """
+    Paces the requests made by an API instance, so that concurrent exports
+    run as fast as Assembla allows rather than failing when throttled.
+
+    - Requests are rate limited with a token bucket.
+    - Responses with a status in `settings.RETRY_STATUSES` are retried with
+      jittered exponential backoff, or after the delay requested by a
+      `Retry-After` header. Non-idempotent requests are only retried after
+      a 429, as Assembla will not have processed them.
+    - The number of requests in flight is halved whenever Assembla throttles
+      a request, and grows back slowly as requests succeed.
+    """
+    def __init__(self, rate=None, burst=None, max_concurrency=None, max_retries=None, backoff=None, max_backoff=None):
+        """
+        :rate
+            The sustained number of requests per second. None for no limit
+        :burst
+            The number of requests which can be made at once before the rate
+            applies. Defaults to `rate`, and is at least 1
+        :max_concurrency
+            The largest number of requests which may be in flight at once
+        :max_retries
+            The number of times a failed request is retried
+        :backoff,
+        :max_backoff
+            The base and maximum number of seconds to wait before retrying
+        """
+        self.rate = settings.RATE_LIMIT if rate is None else rate
+        # The bucket must hold at least one whole token, or no request could be sent
+        self.burst = max(1, burst or self.rate or 1)
+        self.max_concurrency = max_concurrency or settings.MAX_CONCURRENCY
+        self.max_retries = settings.REQUEST_RETRIES if max_retries is None else max_retries
+        self.backoff = settings.BACKOFF if backoff is None else backoff
+        self.max_backoff = settings.MAX_BACKOFF if max_backoff is None else max_backoff
+
+        self.tokens = self.burst
+        self.last_refill = time.time()
+        # Requests are held back until this time, after a `Retry-After`
+        self.paused_until = 0
+        # The current, adaptive, limit on requests in flight
+        self.concurrency = float(self.max_concurrency)
+        self.active = 0
+        self.condition = threading.Condition()
+
+        self.stats = {
+            'requests': 0,
+            'retries': 0,
+            'throttled': 0,
+        }
+
+    def request(self, send, idempotent=True):
+        """
+        Calls `send`, a function which makes a request and returns the
+        response, retrying it if necessary
+        """
+        attempt = 0
+        while True:
+            self._acquire()
+            try:
+                response = send()
+            except (requests.ConnectionError, requests.Timeout):
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+                response = None
+            finally:
+                self._release()
+
+            if response is not None and response.status_code not in settings.RETRY_STATUSES:
+                self._succeeded()
+                return response
+
+            if response is not None and response.status_code in (429, 503):
+                self._throttled()
+
+            if (
+                attempt >= self.max_retries
+                or (not idempotent and response.status_code != 429)
+            ):
+                return response
+
+            delay = self._retry_after(response)
+            if delay is None:
+                # Exponential backoff with full jitter
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+            else:
+                # Hold back every request until Assembla is ready
+                with self.condition:
+                    self.paused_until = max(self.paused_until, time.time() + delay)
+
+            with self.condition:
+                self.stats['retries'] += 1
+            attempt += 1
+            time.sleep(delay)
+
+    def _acquire(self):
+        """
+        Blocks until a request may be sent
+        """
+        with self.condition:
+            while True:
+                now = time.time()
+                if self.rate:
+                    self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+
+                if self.paused_until > now:
+                    wait = self.paused_until - now
+                elif self.active >= int(self.concurrency):
+                    wait = None
+                elif self.rate and self.tokens < 1:
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    if self.rate:
+                        self.tokens -= 1
+                    self.active += 1
+                    self.stats['requests'] += 1
+                    return
+                self.condition.wait(wait)
+
+    def _release(self):
+        with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    def _succeeded(self):
+        with self.condition:
+            # Additive increase
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+            self.condition.notify_all()
+
+    def _throttled(self):
+        with self.condition:
+            # Multiplicative decrease
+            self.concurrency = max(1.0, self.concurrency / 2)
+            self.stats['throttled'] += 1
+
+    def _retry_after(self, response):
+        """
+        The number of seconds requested by a response's `Retry-After`
+        header, or None
+        """
+        if response is None:
+            return None
+        value = response.headers.get('Retry-After', None)
+        if not value:
+            return None
+        try:
+            return max(0, float(value))
+        except ValueError:
+            date = parsedate_tz(value)
+            if date is None:
+                return None
+            return max(0, mktime_tz(date) - time.time())
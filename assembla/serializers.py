@@ -0,0 +1,68 @@
+"""
+Encoders and decoders for the JSON exchanged with Assembla. The standard
+library's `json` module is always available, but decoding and encoding large
+numbers of tickets is considerably faster with one of the optional libraries
+supported here, which are used automatically when installed.
+"""
+import json
+from functools import partial
+from importlib import import_module
+import settings
+
+
+class JSONSerializer(object):
+    """
+    Uses the standard library's `json` module
+    """
+    name = 'json'
+
+    def loads(self, content):
+        """
+        Decodes the raw bytes of a response body
+        """
+        if isinstance(content, bytes) and not isinstance(content, str):
+            content = content.decode('utf-8')
+        return json.loads(content)
+
+    def dumps(self, obj):
+        """
+        Encodes `obj` for the body of a request
+        """
+        return json.dumps(obj)
+
+
+class ModuleSerializer(JSONSerializer):
+    """
+    Uses a library which offers the same `loads` and `dumps` functions as
+    the `json` module, and decodes bytes itself, such as orjson, ujson or
+    simplejson. Raises ImportError if the library is not installed
+    """
+    def __init__(self, name):
+        self.name = name
+        self.module = import_module(name)
+
+    def loads(self, content):
+        return self.module.loads(content)
+
+    def dumps(self, obj):
+        return self.module.dumps(obj)
+
+
+# Serializer name -> a callable which returns an instance of it
+SERIALIZERS = dict(
+    [(name, partial(ModuleSerializer, name)) for name in ('orjson', 'ujson', 'simplejson')] +
+    [(JSONSerializer.name, JSONSerializer)]
+)
+
+
+def get_serializer(names=None):
+    """
+    Returns an instance of the first serializer in `names` whose library is
+    installed. Defaults to the order given by `settings.JSON_SERIALIZERS`
+    """
+    for name in names or settings.JSON_SERIALIZERS:
+        try:
+            return SERIALIZERS[name]()
+        except ImportError:
+            continue
+    return JSONSerializer()
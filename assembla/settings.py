@@ -1,4 +1,84 @@
 API_VERSION = 'v1'
 API_ROOT_PATH = 'https://api.assembla.com'
 
-MAX_PER_PAGE = 100
\ No newline at end of file
+MAX_PER_PAGE = 100
+
+# The number of connections kept alive by each API instance
+POOL_SIZE = 10
+# The number of times a request which failed to connect is retried
+MAX_RETRIES = 0
+
+# The default number of requests in flight during bulk operations
+BULK_CONCURRENCY = 4
+
+# Request scheduling, see `assembla.scheduler`
+# The sustained number of requests per second, or None for no limit
+RATE_LIMIT = None
+# The largest number of requests in flight at once
+MAX_CONCURRENCY = 10
+# Responses which are retried, and how many times
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+REQUEST_RETRIES = 5
+# The base and maximum seconds to wait between retries
+BACKOFF = 0.5
+MAX_BACKOFF = 30
+
+# Crawling many spaces at once, see `assembla.crawler`
+# The Space methods called for each space
+CRAWLER_ENDPOINTS = ('tickets', 'milestones', 'users')
+# The number of calls in flight at once, across every space
+CRAWLER_WORKERS = 8
+# The number of calls in flight at once for a single space
+CRAWLER_PER_SPACE = 1
+
+# Following the activity stream, see `API.stream_follow`
+# The shortest and longest number of seconds between polls
+STREAM_MIN_INTERVAL = 2
+STREAM_MAX_INTERVAL = 60
+# The number of recently seen events remembered, to avoid yielding them twice
+STREAM_DEDUPE_SIZE = 10000
+# The fields which identify an event
+STREAM_KEY_FIELDS = ('date', 'operation', 'object_id', 'space_id', 'author_id', 'title')
+
+# Request metrics, see `assembla.metrics`
+# The upper bounds of the buckets which request durations, in seconds, are counted in
+METRICS_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# The upper bounds of the buckets which the number of pages in a listing are counted in
+METRICS_PAGE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# JSON libraries to use, in order of preference, see `assembla.serializers`.
+# The standard library's `json` module is used if none are installed
+JSON_SERIALIZERS = ('orjson', 'ujson', 'simplejson', 'json')
+
+# Seconds that a Space's lookup tables of milestones, users and components
+# are reused for, see `Space.lookup`
+LOOKUP_TABLE_TTL = 300
+
+# Response caching, see `assembla.cache`
+CACHE_MAX_ENTRIES = 1000
+# Seconds that a cached response is considered fresh for
+CACHE_TTL = 300
+# Seconds that a stale response is kept for revalidation, when
+# a persistent cache is compacted
+CACHE_MAX_STALE = 60 * 60 * 24 * 7
+# Per-model overrides of CACHE_TTL
+CACHE_TTLS = {
+    'Event': 30,
+    'Ticket': 60,
+    'TicketComment': 60,
+    'Milestone': 600,
+    'Tag': 600,
+    'Space': 3600,
+    'SpaceTool': 3600,
+    'Component': 3600,
+    'User': 3600,
+}
+# The paths, relative to a space, whose cached responses are removed when an
+# Event reports a change to each kind of object. Changes to any other kind of
+# object remove every cached response for the space
+CACHE_INVALIDATIONS = {
+    # Ticket lists, along with each ticket's comments and tags
+    'Ticket': ('tickets',),
+    'Milestone': ('milestones',),
+    'WikiPage': ('wiki_pages',),
+}
@@ -0,0 +1,51 @@
+import json
+
+
+class TicketStore(object):
+    """
+    A local mirror of the tickets in one or more spaces, which remembers the
+    most recent `updated_at` value seen in each space so that later syncs
+    only need to fetch the tickets which have changed since.
+
+    Tickets which are deleted on Assembla are not removed from the store.
+    """
+    def __init__(self, tickets=None, watermarks=None):
+        # Space id -> ticket number -> ticket data
+        self.tickets = tickets or {}
+        # Space id -> the latest `updated_at` seen in the space
+        self.watermarks = watermarks or {}
+
+    def watermark(self, space_id):
+        """
+        The latest `updated_at` value seen in the space, or None
+        """
+        return self.watermarks.get(space_id, None)
+
+    def merge(self, space_id, tickets):
+        """
+        Stores `tickets` and advances the space's watermark, returning
+        the tickets which were new or differed from the stored copy
+        """
+        stored = self.tickets.setdefault(space_id, {})
+        changed = []
+        for ticket in tickets:
+            # Keys are converted to strings to survive a round trip through JSON
+            number = str(ticket['number'])
+            data = dict(ticket.items())
+            if stored.get(number) != data:
+                stored[number] = data
+                changed.append(ticket)
+            updated_at = ticket.get('updated_at', None)
+            if updated_at and updated_at > self.watermarks.get(space_id, ''):
+                self.watermarks[space_id] = updated_at
+        return changed
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({'tickets': self.tickets, 'watermarks': self.watermarks}, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(tickets=data['tickets'], watermarks=data['watermarks'])
@@ -0,0 +1,100 @@
+import sys
+import unittest
+from assembla.tests.fake_server import serving
+
+if sys.version_info < (3, 6):
+    raise unittest.SkipTest('assembla.aio requires Python 3.6+')
+
+import asyncio
+from assembla.aio import AsyncAPI
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+def collect(iterator):
+    """
+    Consumes an asynchronous iterator without `async for`, which would not
+    parse under Python 2
+    """
+    items = []
+    while True:
+        try:
+            items.append(run(iterator.__anext__()))
+        except StopAsyncIteration:
+            return items
+
+def get_space(assembla):
+    return run(assembla.spaces())[0]
+
+def test_tickets():
+    with serving():
+        assembla = AsyncAPI(key='key', secret='secret')
+        space = get_space(assembla)
+        tickets = run(space.tickets())
+        assert [ticket['number'] for ticket in tickets] == list(range(1, 1001))
+        assert all(ticket.space is space for ticket in tickets)
+        assert [ticket['number'] for ticket in run(space.tickets(status='Fixed'))][:3] == [2, 6, 10]
+        run(assembla.close())
+
+def test_iter_tickets():
+    with serving():
+        assembla = AsyncAPI(key='key', secret='secret')
+        space = get_space(assembla)
+        assert [ticket['number'] for ticket in collect(space.iter_tickets())] == list(range(1, 1001))
+        run(assembla.close())
+
+def test_comments_for():
+    with serving():
+        assembla = AsyncAPI(key='key', secret='secret')
+        space = get_space(assembla)
+        tickets = run(space.tickets())[:10]
+        comments = run(space.comments_for(tickets + tickets[:3], concurrency=4))
+        assert sorted(comments) == list(range(1, 11))
+        assert all(len(ticket_comments) == 3 for ticket_comments in comments.values())
+        pairs = collect(space.iter_comments_for(tickets[:2]))
+        assert sorted(
+            (number, [comment['id'] for comment in ticket_comments]) for number, ticket_comments in pairs
+        ) == [(1, [1001, 1002, 1003]), (2, [2001, 2002, 2003])]
+        run(assembla.close())
+
+def test_write_and_delete_tickets():
+    with serving():
+        assembla = AsyncAPI(key='key', secret='secret')
+        space = get_space(assembla)
+        tickets = run(space.tickets())[:5]
+        for ticket in tickets:
+            ticket['summary'] = 'Renamed #%s' % ticket['number']
+        result = run(space.write_tickets(tickets, concurrency=2))
+        assert not result.failures
+        assert [returned['summary'] for returned in result.instances] == [
+            'Renamed #%s' % number for number in range(1, 6)
+        ]
+
+        result = run(space.delete_tickets(tickets[:2]))
+        assert [ticket['number'] for ticket, returned in result.successes] == [1, 2]
+        assert len(run(space.tickets())) == 998
+        run(assembla.close())
+
+def test_sync_tickets():
+    with serving():
+        assembla = AsyncAPI(key='key', secret='secret')
+        space = get_space(assembla)
+        changed = run(space.sync_tickets())
+        assert len(changed) == 1000
+        run(assembla.close())
+
+def test_prefetch_related():
+    with serving() as server:
+        assembla = AsyncAPI(key='key', secret='secret')
+        space = get_space(assembla)
+        tickets = run(space.tickets())[:20]
+        run(space.prefetch_related(tickets))
+        requests = server.requests
+        for ticket in tickets:
+            milestone = run(ticket.milestone())
+            assert (milestone and milestone['id']) == ticket['milestone_id']
+            assert run(ticket.user())['id'] == ticket['assigned_to_id']
+        assert server.requests == requests
+        assert run(space.lookup('milestones', tickets[0]['milestone_id'])) is tickets[0].related['milestone']
+        run(assembla.close())
@@ -0,0 +1,342 @@
+"""
+A reproducible benchmark suite, run against a local fake Assembla server so
+that it needs neither credentials nor a live account. Each case records its
+duration, throughput and peak memory use, and can be compared against the
+results of an earlier run to catch regressions.
+
+    python -m assembla.tests.benchmark_suite --output results.json
+    python -m assembla.tests.benchmark_suite --baseline results.json
+"""
+import os
+import sys
+import json
+import time
+import pickle
+import shutil
+import signal
+import argparse
+import tempfile
+import threading
+from assembla import API, settings
+from assembla.replica import Replica
+from assembla.tests.fake_server import FakeAssemblaServer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def current_rss():
+    """
+    The resident memory of this process in bytes, or None if it cannot be read
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError):
+        if resource is None:
+            return None
+        # The peak, rather than the current, resident memory. Kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class PeakMemory(object):
+    """
+    Samples the resident memory of the process in a background thread,
+    recording how far it rises above its level when started
+    """
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.baseline = current_rss()
+        self.peak = self.baseline
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.sample)
+        self.thread.daemon = True
+
+    def sample(self):
+        while not self.stopped.is_set():
+            rss = current_rss()
+            if rss is not None and rss > self.peak:
+                self.peak = rss
+            self.stopped.wait(self.interval)
+
+    def __enter__(self):
+        if self.baseline is not None:
+            self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stopped.set()
+        if self.baseline is not None:
+            self.thread.join()
+            self.sample()
+
+    @property
+    def growth(self):
+        """
+        Megabytes that the resident memory rose by, or None if unknown
+        """
+        if self.baseline is None:
+            return None
+        return (self.peak - self.baseline) / 1024.0 / 1024
+
+
+def measure(func, setup=None):
+    """
+    Calls `func`, which returns the number of items it processed, in a
+    forked process where possible so that its memory use is measured in
+    isolation from the fake server and from earlier cases. If `setup` is
+    provided, it is called first and its result is passed to `func`, without
+    being measured.
+
+    Returns a dictionary of the duration, throughput and peak memory growth
+    """
+    def run():
+        args = (setup(),) if setup else ()
+        with PeakMemory() as memory:
+            start = time.time()
+            items = func(*args)
+            seconds = time.time() - start
+        return {
+            'seconds': seconds,
+            'items': items,
+            'per_second': items / seconds if seconds else None,
+            'peak_mb': memory.growth,
+        }
+
+    if not hasattr(os, 'fork'):
+        return run()
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # The child process
+        # Never return into the caller's code, whatever happens
+        try:
+            os.close(read_fd)
+            try:
+                result = {'result': run()}
+            except Exception as e:
+                result = {'error': repr(e)}
+            with os.fdopen(write_fd, 'wb') as f:
+                pickle.dump(result, f)
+        finally:
+            os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd, 'rb') as f:
+        try:
+            result = pickle.load(f)
+        except EOFError:
+            result = {'error': 'The benchmark process exited without a result'}
+    os.waitpid(pid, 0)
+    if 'error' in result:
+        raise RuntimeError(result['error'])
+    return result['result']
+
+
+class Server(object):
+    """
+    Points the API at a FakeAssemblaServer for the duration of a `with` block.
+
+    Where possible, the server runs in a separate process, so that its data
+    is not counted in the memory used by the cases
+    """
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.server = None
+        self.pid = None
+
+    def __enter__(self):
+        self.root_path = settings.API_ROOT_PATH
+        if hasattr(os, 'fork'):
+            read_fd, write_fd = os.pipe()
+            self.pid = os.fork()
+            if self.pid == 0:  # The child process, which serves until it is killed
+                # Never return into the caller's code, whatever happens
+                try:
+                    os.close(read_fd)
+                    server = FakeAssemblaServer(**self.kwargs)
+                    server.start()
+                    with os.fdopen(write_fd, 'w') as f:
+                        f.write(server.url)
+                    while True:
+                        time.sleep(60)
+                finally:
+                    os._exit(1)
+            os.close(write_fd)
+            with os.fdopen(read_fd) as f:
+                url = f.read()
+            if not url:
+                os.waitpid(self.pid, 0)
+                raise RuntimeError('The fake server failed to start')
+            settings.API_ROOT_PATH = url
+        else:
+            self.server = FakeAssemblaServer(**self.kwargs)
+            self.server.start()
+            settings.API_ROOT_PATH = self.server.url
+
+    def __exit__(self, *args):
+        settings.API_ROOT_PATH = self.root_path
+        if self.pid:
+            os.kill(self.pid, signal.SIGTERM)
+            os.waitpid(self.pid, 0)
+        else:
+            self.server.stop()
+
+
+def api():
+    return API(key='key', secret='secret')
+
+
+def case_spaces(calls=200):
+    def run():
+        assembla = api()
+        for _ in xrange(calls):
+            assembla.spaces()
+        return calls
+    with Server(spaces=20, tickets_per_space=0):
+        return measure(run)
+
+
+def case_tickets(tickets, description_length=None):
+    def run():
+        return len(api().spaces()[0].tickets())
+    with Server(tickets_per_space=tickets, description_length=description_length):
+        return measure(run)
+
+
+def case_comments(tickets=500, latency=0.005):
+    def run():
+        space = api().spaces()[0]
+        return len(space.comments_for(space.tickets(), concurrency=8))
+    with Server(tickets_per_space=tickets, latency=latency):
+        return measure(run)
+
+
+def case_writes(tickets=500):
+    def setup():
+        return api().spaces()[0].tickets()
+
+    def run(results):
+        for ticket in results:
+            ticket['status'] = 'Fixed'
+            ticket.write()
+        return len(results)
+    with Server(tickets_per_space=tickets):
+        return measure(run, setup)
+
+
+def case_filter(tickets=10000, filters=200):
+    def setup():
+        return api().spaces()[0].tickets()
+
+    def run(results):
+        for i in xrange(filters):
+            results.filter(status='Fixed', milestone_id=i % 5)
+        return filters
+    with Server(tickets_per_space=tickets):
+        return measure(run, setup)
+
+
+def case_replica(tickets=100000, queries=20):
+    def setup():
+        replica = Replica(os.path.join(directory, 'replica.sqlite'))
+        replica.sync(api().spaces()[0], resources=['tickets'])
+        return replica
+
+    def run(replica):
+        for _ in xrange(queries):
+            replica.count('tickets', by='status')
+            replica.query('tickets', status='Fixed', priority=3, milestone_id=2)
+            replica.query('tickets', updated_at__gte='2014-01-01', order_by='-number', limit=50)
+        return queries * 3
+    directory = tempfile.mkdtemp()
+    try:
+        with Server(tickets_per_space=tickets):
+            return measure(run, setup)
+    finally:
+        shutil.rmtree(directory)
+
+
+def cases(sizes, description_length=None):
+    yield 'API.spaces()', case_spaces
+    for size in sizes:
+        yield 'Space.tickets() {0}'.format(size), lambda size=size: case_tickets(size, description_length)
+    yield 'Space.comments_for()', case_comments
+    yield 'Ticket.write()', case_writes
+    yield 'AssemblaCollection.filter()', case_filter
+    yield 'Replica.query()', case_replica
+
+
+def run_suite(sizes=(1000, 10000, 100000), description_length=None):
+    """
+    Runs every case, printing and returning their results
+    """
+    results = {}
+    for name, case in cases(sizes, description_length):
+        result = results[name] = case()
+        print '{0}: {1:.2f}s, {2:.0f}/s, peak memory +{3}'.format(
+            name,
+            result['seconds'],
+            result['per_second'] or 0,
+            '{0:.1f} MB'.format(result['peak_mb']) if result['peak_mb'] is not None else '?',
+        )
+    return results
+
+
+def regressions(results, baseline, tolerance=0.2):
+    """
+    Returns a description of each case which was slower, or used more memory,
+    than in `baseline` by more than `tolerance` (a fraction)
+    """
+    found = []
+    for name, result in sorted(results.items()):
+        previous = baseline.get(name, None)
+        if previous is None:
+            continue
+        for metric in ('seconds', 'peak_mb'):
+            if result[metric] is None or not previous[metric]:
+                continue
+            if result[metric] > previous[metric] * (1 + tolerance):
+                found.append('{0}: {1} rose from {2:.2f} to {3:.2f}'.format(
+                    name, metric, previous[metric], result[metric]
+                ))
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m assembla.tests.benchmark_suite')
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+        help='The numbers of tickets to time Space.tickets() with',
+    )
+    parser.add_argument(
+        '--description-length', type=int,
+        help='The number of characters in each ticket\'s description, to vary the size of the payloads',
+    )
+    parser.add_argument('--output', help='A file to write the results to, as JSON')
+    parser.add_argument('--baseline', help='The results of an earlier run, to compare against')
+    parser.add_argument(
+        '--tolerance', type=float, default=0.2,
+        help='The fraction by which a case may regress before it is reported',
+    )
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.sizes, args.description_length)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for regression in found:
+            print 'Regression - {0}'.format(regression)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
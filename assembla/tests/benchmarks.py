@@ -0,0 +1,235 @@
+"""
+Benchmarks which compare alternative approaches side by side, run against a
+local fake Assembla server using the harness of `benchmark_suite`.
+
+    python -m assembla.tests.benchmarks
+"""
+import sys
+import time
+import json
+import requests
+from assembla import Ticket, settings
+from assembla.crawler import Crawler
+from assembla.lib import AssemblaCollection, CompactData
+from assembla.serializers import SERIALIZERS
+from assembla.tests.benchmark_suite import Server, api as build_api
+from assembla.tests.fake_server import FakeAssemblaServer
+
+
+def timed(func, *args, **kwargs):
+    start = time.time()
+    result = func(*args, **kwargs)
+    return time.time() - start, result
+
+
+def ticket_records(tickets):
+    """
+    The fake server's tickets, decoded from JSON as the API would
+    """
+    server = FakeAssemblaServer(tickets_per_space=0)
+    return json.loads(json.dumps([
+        server._build_ticket('space-0', number) for number in xrange(1, tickets + 1)
+    ]))
+
+
+def benchmark_pagination(tickets=20000, latency=0.02, workers=(1, 4, 8)):
+    """
+    Times `Space.tickets()` with sequential and concurrent page fetching
+    """
+    with Server(tickets_per_space=tickets, latency=latency):
+        api = build_api()
+        space = api.spaces()[0]
+        print 'Space.tickets() - {0} tickets, {1}s latency per request'.format(tickets, latency)
+        for count in workers:
+            api.page_workers = count
+            duration, results = timed(space.tickets)
+            assert len(results) == tickets
+            print '    page_workers={0}: {1:.2f}s'.format(count, duration)
+
+
+def benchmark_writes(tickets=500):
+    """
+    Compares updating tickets over a fresh connection per request with
+    updating them through the API's pooled, keep-alive session
+    """
+    with Server(tickets_per_space=tickets):
+        api = build_api()
+        space = api.spaces()[0]
+        results = space.tickets()
+
+        def unpooled_writes():
+            for ticket in results:
+                requests.put(
+                    url='{0}/{1}/{2}/{3}.json'.format(
+                        settings.API_ROOT_PATH,
+                        settings.API_VERSION,
+                        space._build_rel_path('tickets'),
+                        ticket['number'],
+                    ),
+                    data=json.dumps(ticket.changes()),
+                    headers={
+                        'X-Api-Key': api.key,
+                        'X-Api-Secret': api.secret,
+                        'Content-type': "application/json",
+                    },
+                )
+
+        for ticket in results:
+            ticket['status'] = 'Fixed'
+
+        def pooled_writes():
+            for ticket in results:
+                ticket.write()
+
+        print 'Ticket.write() - {0} tickets'.format(tickets)
+        for name, func in (('new connection per write', unpooled_writes), ('pooled session', pooled_writes)):
+            duration, _ = timed(func)
+            print '    {0}: {1:.0f} writes/s'.format(name, tickets / duration)
+
+
+def deep_size(obj, seen=None):
+    """
+    The approximate number of bytes used by `obj` and everything it references
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif isinstance(obj, CompactData):
+        size += deep_size(obj.schema.fields, seen) + deep_size(obj.row, seen)
+    elif hasattr(obj, 'data'):
+        size += deep_size(obj.data if isinstance(obj, LegacyTicket) else obj._data, seen)
+        # Reading `__dict__` would allocate one for slotted instances
+        if not hasattr(type(obj), '__slots__'):
+            size += deep_size(obj.__dict__, seen)
+    return size
+
+
+class LegacyTicket(object):
+    """
+    The layout of AssemblaObjects before `__slots__` and CompactData
+    """
+    def __init__(self, data):
+        self.data = data
+
+
+def benchmark_memory(tickets=100000):
+    """
+    Compares the memory used by tickets in each representation
+    """
+    records = ticket_records(tickets)
+
+    representations = (
+        ('dictionary data, instance __dict__', lambda: [LegacyTicket(dict(obj)) for obj in records]),
+        ('dictionary data, __slots__', lambda: [Ticket(dict(obj)) for obj in records]),
+        ('CompactData, __slots__', lambda: [Ticket(CompactData(obj)) for obj in records]),
+    )
+
+    print 'Memory used by {0} tickets'.format(tickets)
+    for name, build in representations:
+        instances = build()
+        for instance in instances:
+            instance.api = instance.space = None
+        print '    {0}: {1:.1f} MB'.format(name, deep_size(instances) / 1024.0 / 1024)
+
+
+def benchmark_materialization(tickets=100000):
+    """
+    Times counting and filtering a listing when every ticket is instantiated
+    up front, and when tickets are only instantiated once accessed
+    """
+    records = ticket_records(tickets)
+
+    def count_fixed(collection):
+        return len(collection.filter(status='Fixed'))
+
+    representations = (
+        ('eager', lambda: AssemblaCollection(Ticket(obj) for obj in records)),
+        ('lazy', lambda: AssemblaCollection.lazy(records, Ticket)),
+    )
+
+    print 'Filtering {0} tickets'.format(tickets)
+    for name, build in representations:
+        duration, _ = timed(lambda: count_fixed(build()))
+        print '    {0}: {1:.2f}s'.format(name, duration)
+
+
+def benchmark_serializers(pages=200):
+    """
+    Times decoding pages of tickets, and encoding individual tickets,
+    with each of the installed JSON libraries
+    """
+    page = ticket_records(settings.MAX_PER_PAGE)
+    content = json.dumps(page).encode('utf-8')
+
+    print 'Decoding {0} pages and encoding {1} tickets'.format(pages, pages * len(page))
+    for name in settings.JSON_SERIALIZERS:
+        try:
+            serializer = SERIALIZERS[name]()
+        except ImportError:
+            print '    {0}: not installed'.format(name)
+            continue
+        decode, _ = timed(lambda: [serializer.loads(content) for _ in xrange(pages)])
+        encode, _ = timed(lambda: [serializer.dumps(ticket) for _ in xrange(pages) for ticket in page])
+        print '    {0}: {1:.2f}s decoding, {2:.2f}s encoding'.format(name, decode, encode)
+
+
+def benchmark_crawler(spaces=50, tickets=200, latency=0.02):
+    """
+    Compares visiting every space in turn with crawling them concurrently
+    """
+    with Server(spaces=spaces, tickets_per_space=tickets, latency=latency):
+        api = build_api()
+        endpoints = settings.CRAWLER_ENDPOINTS
+
+        def sequential():
+            for space in api.spaces():
+                for endpoint in endpoints:
+                    getattr(space, endpoint)()
+
+        def crawled():
+            for result in Crawler(api).iter_results():
+                assert result.error is None
+
+        print 'Crawling {0} spaces - {1}'.format(spaces, ', '.join(endpoints))
+        for name, func in (('one space at a time', sequential), ('Crawler', crawled)):
+            duration, _ = timed(func)
+            print '    {0}: {1:.2f}s'.format(name, duration)
+
+
+def benchmark_comments(tickets=500, latency=0.02):
+    """
+    Compares fetching the comments of each ticket in turn with `Space.comments_for`
+    """
+    with Server(tickets_per_space=tickets, latency=latency):
+        api = build_api()
+        space = api.spaces()[0]
+        results = space.tickets()
+
+        def sequential():
+            return dict((ticket['number'], ticket.comments()) for ticket in results)
+
+        print 'Comments of {0} tickets, {1}s latency per request'.format(tickets, latency)
+        for name, func in (
+            ('Ticket.comments()', sequential),
+            ('Space.comments_for()', lambda: space.comments_for(results, concurrency=8)),
+        ):
+            duration, comments = timed(func)
+            assert len(comments) == tickets
+            print '    {0}: {1:.2f}s'.format(name, duration)
+
+
+if __name__ == '__main__':
+    benchmark_pagination()
+    benchmark_writes()
+    benchmark_memory()
+    benchmark_materialization()
+    benchmark_serializers()
+    benchmark_crawler()
+    benchmark_comments()
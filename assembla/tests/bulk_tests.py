@@ -0,0 +1,35 @@
+from assembla import API, Ticket
+from assembla.tests.fake_server import serving
+
+
+def get_space():
+    return API(key='key', secret='secret').spaces()[0]
+
+def test_write_tickets_records_failures_without_aborting():
+    with serving(tickets_per_space=20) as server:
+        space = get_space()
+        tickets = space.tickets()[:5]
+        for ticket in tickets:
+            ticket['status'] = 'Fixed'
+        # Not on the server, so updating it fails with 404 Not Found
+        missing = Ticket({'number': 999, 'status': 'Fixed'})
+        new = Ticket({'summary': 'New ticket'})
+        batch = tickets[:2] + [missing] + tickets[2:] + [new]
+
+        result = space.write_tickets(batch, concurrency=3)
+        assert [ticket for ticket, returned in result.successes] == tickets[:2] + tickets[2:] + [new]
+        assert [ticket for ticket, error in result.failures] == [missing]
+        assert result.failures[0][1].status_code == 404
+        assert missing.space is space
+        assert result.instances[-1]['number'] == 21
+        assert [ticket['status'] for ticket in server.tickets['space-0'][:5]] == ['Fixed'] * 5
+
+def test_delete_tickets_records_failures_without_aborting():
+    with serving(tickets_per_space=20) as server:
+        space = get_space()
+        tickets = space.tickets()[:3]
+        missing = Ticket({'number': 999})
+        result = space.delete_tickets([missing] + tickets)
+        assert [ticket for ticket, returned in result.successes] == tickets
+        assert [ticket for ticket, error in result.failures] == [missing]
+        assert [ticket['number'] for ticket in server.tickets['space-0']] == list(range(4, 21))
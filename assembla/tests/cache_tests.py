@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+from assembla import API, Event, Component
+from assembla.cache import LRUCache, SQLiteCache
+from assembla.tests.fake_server import serving
+
+
+def test_cache_hits_and_misses():
+    cache = LRUCache()
+    assert cache.get('a') is None
+    cache.set('a', [{'id': 1}])
+    assert cache.get('a') == [{'id': 1}]
+    assert cache.stats['hits'] == 1
+    assert cache.stats['misses'] == 1
+
+def test_cache_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set('a', [])
+    cache.set('b', [])
+    cache.get('a')
+    cache.set('c', [])
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert cache.get('a') == []
+    assert cache.stats['evictions'] == 1
+
+def test_cache_expires_stale_entries():
+    cache = LRUCache()
+    cache.set('a', [], ttl=-1, etag='"abc"')
+    assert cache.get('a') is None
+    # Stale entries are kept, so that they can be revalidated
+    entry = cache.get_entry('a')
+    assert not entry.is_fresh()
+    assert entry.etag == '"abc"'
+
+def test_cache_ttls_are_per_model():
+    cache = LRUCache(default_ttl=100, ttls={'Event': 5})
+    assert cache.ttl_for(Event) == 5
+    assert cache.ttl_for(Component) != 5
+
+def test_cache_is_not_shared_between_api_instances():
+    assert API(key='key', secret='secret').cache is not API(key='key', secret='secret').cache
+
+def test_cache_prefix_depends_on_credentials():
+    assert (
+        API(key='key', secret='secret').cache_prefix !=
+        API(key='key', secret='other secret').cache_prefix
+    )
+
+def test_sqlite_cache_persists_between_instances():
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'cache.sqlite')
+        SQLiteCache(path).set('a', [{'id': 1}], etag='"abc"')
+        entry = SQLiteCache(path).get_entry('a')
+        assert entry.value == [{'id': 1}]
+        assert entry.etag == '"abc"'
+        assert entry.is_fresh()
+    finally:
+        shutil.rmtree(directory)
+
+def test_sqlite_cache_compaction():
+    directory = tempfile.mkdtemp()
+    try:
+        cache = SQLiteCache(os.path.join(directory, 'cache.sqlite'), max_entries=2)
+        cache.set('stale', [], ttl=-100)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, [])
+        cache.compact(max_stale=10)
+        assert len(cache) == 2
+        assert cache.get_entry('stale') is None
+        assert cache.stats['evictions'] == 1
+    finally:
+        shutil.rmtree(directory)
+
+def test_cache_deletes_by_prefix():
+    directory = tempfile.mkdtemp()
+    try:
+        for cache in (LRUCache(), SQLiteCache(os.path.join(directory, 'cache.sqlite'))):
+            for key in ('p:spaces/a/wiki_pages.json', 'p:spaces/a/wiki_pages/1.json', 'p:spaces/a/wikixpages.json'):
+                cache.set(key, [])
+            assert cache.delete_prefix('p:spaces/a/wiki_pages') == 2
+            # Underscores are not treated as wildcards
+            assert cache.get('p:spaces/a/wikixpages.json') == []
+            assert cache.stats['invalidated'] == 2
+    finally:
+        shutil.rmtree(directory)
+
+def test_api_revalidates_stale_responses():
+    with serving(tickets_per_space=50) as server:
+        # Responses are stale as soon as they are stored
+        assembla = API(key='key', secret='secret', cache=LRUCache(ttls={'Ticket': -1}))
+        assembla.cache_responses = True
+        space = assembla.spaces()[0]
+        first = space.tickets()
+
+        # Assembla confirms that the cached page is unchanged, so it is reused
+        second = space.tickets()
+        assert server.not_modified == 1
+        assert assembla.cache.stats['revalidated'] == 1
+        assert second.records[0] is first.records[0]
+
+        # Once the ticket changes, the page is downloaded again
+        server.tickets[space['id']][0]['status'] = 'Fixed'
+        third = space.tickets()
+        assert server.not_modified == 1
+        assert assembla.cache.stats['refetched'] == 1
+        assert third[0]['status'] == 'Fixed'
@@ -0,0 +1,29 @@
+import threading
+from assembla import API
+from assembla.tests.fake_server import serving
+
+
+def test_comments_for_fetches_each_ticket_once():
+    with serving(tickets_per_space=50, comments_per_ticket=2) as server:
+        space = API(key='key', secret='secret').spaces()[0]
+        tickets = space.tickets()
+        requests = server.requests
+        comments = space.comments_for(list(tickets) + list(tickets[:10]), concurrency=4)
+        assert sorted(comments) == list(range(1, 51))
+        assert [comment['comment'] for comment in comments[7]] == [
+            'Comment #1 on ticket #7', 'Comment #2 on ticket #7'
+        ]
+        assert server.requests - requests == 50
+
+def test_concurrent_requests_for_a_page_are_shared():
+    with serving(tickets_per_space=1, comments_per_ticket=2, latency=0.1) as server:
+        ticket = API(key='key', secret='secret').spaces()[0].tickets()[0]
+        requests = server.requests
+        counts = []
+        threads = [threading.Thread(target=lambda: counts.append(len(ticket.comments()))) for _ in xrange(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert counts == [2] * 5
+        assert server.requests - requests < 5
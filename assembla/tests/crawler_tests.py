@@ -0,0 +1,57 @@
+import time
+import threading
+from assembla import API
+from assembla.crawler import Crawler
+from assembla.tests.fake_server import serving
+
+
+class RecordingSpace(object):
+    """
+    Stands in for a Space, recording the calls made to it
+    """
+    lock = threading.Lock()
+    calls = []
+
+    def __init__(self, name):
+        self.name = name
+        self.in_flight = 0
+        self.most_in_flight = 0
+
+    def __getattr__(self, endpoint):
+        def call():
+            with self.lock:
+                self.calls.append(self.name)
+                self.in_flight += 1
+                self.most_in_flight = max(self.most_in_flight, self.in_flight)
+            time.sleep(0.01)
+            with self.lock:
+                self.in_flight -= 1
+            if endpoint == 'broken':
+                raise ValueError(endpoint)
+            return [endpoint]
+        return call
+
+def test_crawler_is_fair_between_spaces():
+    RecordingSpace.calls = []
+    spaces = [RecordingSpace(name) for name in 'abcd']
+    crawler = Crawler(api=None, endpoints=('tickets', 'milestones', 'users'), workers=3, per_space=1)
+    results = list(crawler.iter_results(spaces))
+    assert len(results) == 12
+    # Every space is visited before any space is visited twice
+    assert sorted(RecordingSpace.calls[:4]) == ['a', 'b', 'c', 'd']
+    assert all(space.most_in_flight == 1 for space in spaces)
+
+def test_crawler_reports_failures():
+    spaces = [RecordingSpace(name) for name in 'ab']
+    received = []
+    failures = Crawler(api=None, endpoints=('tickets', 'broken')).crawl(received.append, spaces)
+    assert len(received) == 4
+    assert sorted(failure.space.name for failure in failures) == ['a', 'b']
+    assert all(isinstance(failure.error, ValueError) for failure in failures)
+
+def test_crawler_crawls_every_space():
+    with serving(spaces=5, tickets_per_space=150):
+        results = list(Crawler(API(key='key', secret='secret')).iter_results())
+        assert len(results) == 15
+        assert all(result.error is None for result in results)
+        assert sum(len(result.objects) for result in results if result.endpoint == 'tickets') == 750
@@ -0,0 +1,91 @@
+import os
+import gzip
+import json
+import shutil
+import tempfile
+from contextlib import contextmanager
+from assembla import API
+from assembla.export import SpaceExporter, export_space
+from assembla.tests.fake_server import serving
+
+
+class Interrupted(Exception):
+    pass
+
+
+@contextmanager
+def temporary_directory():
+    directory = tempfile.mkdtemp()
+    try:
+        yield directory
+    finally:
+        shutil.rmtree(directory)
+
+def get_space():
+    return API(key='key', secret='secret').spaces()[0]
+
+def read_numbers(path):
+    with gzip.open(path) as f:
+        return [json.loads(line)['number'] for line in f.read().splitlines()]
+
+def test_export_streams_tickets_to_ndjson():
+    with serving(tickets_per_space=250), temporary_directory() as directory:
+        space = get_space()
+        counts = export_space(space, directory, compression='gzip', resources=['tickets', 'milestones'])
+        assert counts == {'tickets': 250, 'milestones': 4}
+        assert read_numbers(os.path.join(directory, 'tickets.ndjson.gz')) == list(range(1, 251))
+
+def test_export_resumes_from_the_last_complete_page():
+    with serving(tickets_per_space=250), temporary_directory() as directory:
+        space = get_space()
+        exporter = SpaceExporter(space, directory, compression='gzip')
+        write = exporter._write
+        def interrupted_write(f, resource, objects):
+            if exporter.state[resource]['units'] == 1:
+                # A partially written page
+                f.write(b'\x1f\x8b')
+                raise Interrupted()
+            write(f, resource, objects)
+        exporter._write = interrupted_write
+        try:
+            exporter.export(['tickets'])
+        except Interrupted:
+            pass
+
+        counts = export_space(space, directory, compression='gzip', resources=['tickets'])
+        assert counts == {'tickets': 150}
+        assert read_numbers(os.path.join(directory, 'tickets.ndjson.gz')) == list(range(1, 251))
+
+def test_export_skips_unavailable_resources():
+    with serving(tickets_per_space=250), temporary_directory() as directory:
+        space = get_space()
+        # The fake server has no wiki pages endpoint, so answers with 404 Not Found
+        counts = export_space(space, directory, resources=['milestones', 'wiki_pages'])
+        assert counts == {'milestones': 4, 'wiki_pages': None}
+        with open(os.path.join(directory, 'export.json')) as f:
+            state = json.load(f)
+        assert state['wiki_pages']['unavailable'] and state['wiki_pages']['complete']
+        assert export_space(space, directory, resources=['wiki_pages']) == {'wiki_pages': None}
+
+def test_export_skips_comments_without_tickets():
+    with serving(tickets_per_space=250) as server, temporary_directory() as directory:
+        route = server.route
+        # Answer the ticket listing with 404 Not Found
+        server.route = lambda path: None if path.endswith('/tickets.json') else route(path)
+        space = get_space()
+        counts = export_space(space, directory, resources=['ticket_comments', 'tickets', 'milestones'])
+        assert counts == {'ticket_comments': None, 'tickets': None, 'milestones': 4}
+        with open(os.path.join(directory, 'export.json')) as f:
+            assert json.load(f)['ticket_comments']['unavailable']
+
+def test_export_writes_comments_once_per_page_of_tickets():
+    with serving(tickets_per_space=250), temporary_directory() as directory:
+        exporter = SpaceExporter(get_space(), directory)
+        writes = []
+        write = exporter._write
+        def counted_write(f, resource, objects):
+            writes.append(len(objects))
+            write(f, resource, objects)
+        exporter._write = counted_write
+        assert exporter.export(['ticket_comments']) == {'ticket_comments': 750}
+        assert writes == [300, 300, 150]
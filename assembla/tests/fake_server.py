@@ -0,0 +1,318 @@
+"""
+A local stand-in for Assembla's API, used to benchmark the wrapper without
+needing credentials or a live account.
+
+Usage:
+
+    with serving(tickets_per_space=2000, latency=0.05) as server:
+        ...
+"""
+import re
+import json
+import socket
+import hashlib
+import time
+import threading
+import urlparse
+from contextlib import contextmanager
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from SocketServer import ThreadingMixIn
+from assembla import settings
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class FakeAssemblaServer(object):
+    """
+    Serves synthetic spaces and tickets over HTTP, paginated in the
+    same manner as Assembla's API
+    """
+    def __init__(self, spaces=1, tickets_per_space=1000, latency=0.0, throttle_every=None, comments_per_ticket=3, description_length=None):
+        """
+        :spaces
+            The number of spaces to generate
+        :tickets_per_space
+            The number of tickets to generate in each space
+        :latency
+            Seconds to wait before answering each request
+        :throttle_every
+            If set, every nth request is answered with a 429 Too Many Requests
+        :comments_per_ticket
+            The number of comments on each ticket
+        :description_length
+            If set, the number of characters in each ticket's description,
+            to control the size of the payloads
+        """
+        self.latency = latency
+        self.comments_per_ticket = comments_per_ticket
+        self.description_length = description_length
+        self.throttle_every = throttle_every
+        self.requests = 0
+        # Requests answered with 304 Not Modified
+        self.not_modified = 0
+        self.spaces = [
+            {'id': 'space-{0}'.format(i), 'name': 'Space {0}'.format(i)}
+            for i in xrange(spaces)
+        ]
+        self.tickets = dict(
+            (space['id'], [
+                self._build_ticket(space['id'], number)
+                for number in xrange(1, tickets_per_space + 1)
+            ])
+            for space in self.spaces
+        )
+        self.milestones = dict(
+            (space['id'], [
+                {'id': i, 'title': 'Milestone #{0}'.format(i), 'space_id': space['id']}
+                for i in xrange(1, 5)
+            ])
+            for space in self.spaces
+        )
+        self.users = dict(
+            (space['id'], [
+                {'id': 'user-{0}'.format(i), 'login': 'user{0}'.format(i), 'name': 'User {0}'.format(i)}
+                for i in xrange(7)
+            ])
+            for space in self.spaces
+        )
+        # The activity stream, newest first
+        self.events = []
+        self.lock = threading.Lock()
+        self.httpd = None
+
+    def _build_ticket(self, space_id, number):
+        description = 'Description of ticket #{0}'.format(number)
+        if self.description_length is not None:
+            description = (description + ' ') * (self.description_length // len(description) + 1)
+            description = description[:self.description_length]
+        return {
+            'id': number * 10,
+            'number': number,
+            'summary': 'Ticket #{0}'.format(number),
+            'description': description,
+            'priority': number % 5 + 1,
+            'status': ('New', 'Accepted', 'Fixed', 'Invalid')[number % 4],
+            'state': number % 2,
+            'space_id': space_id,
+            'milestone_id': number % 5 or None,
+            'component_id': None,
+            'assigned_to_id': 'user-{0}'.format(number % 7),
+            'reporter_id': 'user-0',
+            'created_on': '2014-01-01T00:00:00Z',
+            'updated_at': '2014-01-02T00:00:00Z',
+            'completed_date': None,
+            'estimate': 1.0,
+            'total_estimate': 1.0,
+            'working_hours': 0.0,
+            'total_working_hours': 0.0,
+            'total_invested_hours': 0.0,
+            'importance': 0,
+            'is_story': False,
+            'story_importance': 0,
+            'permission_type': 1,
+            'notification_list': '',
+            'custom_fields': {},
+        }
+
+    def _build_comment(self, ticket_number, number):
+        return {
+            'id': ticket_number * 1000 + number,
+            'ticket_id': ticket_number * 10,
+            'comment': 'Comment #{0} on ticket #{1}'.format(number, ticket_number),
+            'user_id': 'user-{0}'.format(number % 7),
+            'created_on': '2014-01-01T00:00:00Z',
+            'updated_at': '2014-01-01T00:00:00Z',
+            'ticket_changes': '',
+        }
+
+    def add_event(self, date, space_id='space-0', object_id=1, operation='updated', title='Ticket #1'):
+        """
+        Adds an event to the activity stream. `date` is an ISO 8601 timestamp
+        """
+        with self.lock:
+            self.events.insert(0, {
+                'date': date,
+                'space_id': space_id,
+                'object_id': object_id,
+                'operation': operation,
+                'title': title,
+                'author_id': 'user-0',
+                'object': 'Ticket',
+            })
+            self.events.sort(key=lambda event: event['date'], reverse=True)
+
+    @property
+    def url(self):
+        return 'http://{0}:{1}'.format(*self.httpd.server_address)
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep connections alive between requests
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                BaseHTTPRequestHandler.setup(self)
+                # Avoid stalls from delayed ACKs on kept-alive connections
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def do_GET(self):
+                server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                if server.throttle_every and server.requests % server.throttle_every == 0:
+                    return self.respond(429, {'error': 'Too many requests'}, headers={'Retry-After': '0.1'})
+                parsed = urlparse.urlparse(self.path)
+                query = dict(urlparse.parse_qsl(parsed.query))
+                results = server.route(parsed.path)
+                if results is None:
+                    return self.respond(404, {'error': 'Not found'})
+                if 'from' in query:
+                    # Assembla compares events to the minute
+                    results = [
+                        obj for obj in results
+                        if obj['date'].replace('T', ' ')[:16] >= query['from']
+                    ]
+                if 'sort_by' in query:
+                    results = sorted(
+                        results,
+                        key=lambda obj: obj.get(query['sort_by']),
+                        reverse=query.get('sort_order') == 'desc'
+                    )
+                if 'per_page' in query:
+                    per_page = int(query['per_page'])
+                    start = (int(query.get('page', 1)) - 1) * per_page
+                    results = results[start:start + per_page]
+                if not results:
+                    return self.respond(204)
+                etag = '"{0}"'.format(hashlib.md5(json.dumps(results).encode('utf-8')).hexdigest())
+                if self.headers.get('If-None-Match') == etag:
+                    server.not_modified += 1
+                    return self.respond(304, etag=etag)
+                self.respond(200, results, etag=etag)
+
+            def do_POST(self):
+                self.do_write('POST')
+
+            def do_PUT(self):
+                self.do_write('PUT')
+
+            def do_DELETE(self):
+                self.do_write('DELETE')
+
+            def do_write(self, method):
+                server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                length = int(self.headers.get('Content-Length') or 0)
+                data = json.loads(self.rfile.read(length)) if length else None
+                status, body = server.write(method, urlparse.urlparse(self.path).path, data)
+                self.respond(status, body)
+
+            def respond(self, status, body=None, etag=None, headers=None):
+                content = json.dumps(body).encode('utf-8') if body is not None else b''
+                self.send_response(status)
+                if etag:
+                    self.send_header('ETag', etag)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=self.httpd.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def write(self, method, path, data):
+        """
+        Applies a POST, PUT or DELETE to the tickets, returning
+        the status code and body of the response
+        """
+        with self.lock:
+            match = re.match(r'^/v1/spaces/([^/]+)/tickets(?:\.json)?$', path)
+            if match and method == 'POST' and match.group(1) in self.tickets:
+                tickets = self.tickets[match.group(1)]
+                number = max([ticket['number'] for ticket in tickets] or [0]) + 1
+                ticket = self._build_ticket(match.group(1), number)
+                ticket.update(data or {})
+                tickets.append(ticket)
+                return 201, ticket
+
+            match = re.match(r'^/v1/spaces/([^/]+)/tickets/(\d+)\.json$', path)
+            if match and method in ('PUT', 'DELETE'):
+                tickets = self.tickets.get(match.group(1), [])
+                for i, ticket in enumerate(tickets):
+                    if ticket['number'] == int(match.group(2)):
+                        if method == 'PUT':
+                            ticket.update(data or {})
+                        else:
+                            del tickets[i]
+                        return 204, None
+
+        return 404, {'error': 'Not found'}
+
+    def route(self, path):
+        """
+        Returns the full list of objects available from `path`, or None
+        """
+        if re.match(r'^/v1/spaces\.json$', path):
+            return self.spaces
+        if re.match(r'^/v1/activity\.json$', path):
+            return list(self.events)
+        match = re.match(r'^/v1/spaces/([^/]+)/(.+)\.json$', path)
+        if match:
+            space_id, endpoint = match.groups()
+            if endpoint == 'tickets':
+                return self.tickets.get(space_id)
+            if endpoint.startswith('tickets/milestone/') and space_id in self.tickets:
+                milestone_id = int(endpoint.split('/')[-1])
+                return [
+                    ticket for ticket in self.tickets[space_id]
+                    if ticket['milestone_id'] == milestone_id
+                ]
+            match = re.match(r'^tickets/(\d+)/ticket_comments$', endpoint)
+            if match and space_id in self.tickets:
+                ticket_number = int(match.group(1))
+                return [
+                    self._build_comment(ticket_number, number)
+                    for number in xrange(1, self.comments_per_ticket + 1)
+                ]
+            if endpoint == 'milestones/all':
+                return self.milestones.get(space_id)
+            if endpoint == 'users':
+                return self.users.get(space_id)
+            if endpoint == 'ticket_components':
+                return []
+            if endpoint == 'tags':
+                return []
+
+
+@contextmanager
+def serving(**kwargs):
+    """
+    Starts a FakeAssemblaServer, created with `kwargs`, and points the API
+    at it for the duration of a `with` block
+    """
+    server = FakeAssemblaServer(**kwargs)
+    server.start()
+    root_path = settings.API_ROOT_PATH
+    settings.API_ROOT_PATH = server.url
+    try:
+        yield server
+    finally:
+        settings.API_ROOT_PATH = root_path
+        server.stop()
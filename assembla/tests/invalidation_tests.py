@@ -0,0 +1,82 @@
+import time
+from assembla import API
+from assembla.invalidation import CacheInvalidator
+from assembla.tests.fake_server import serving
+
+
+def get_api():
+    assembla = API(key='key', secret='secret')
+    assembla.cache_responses = True
+    return assembla
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+def test_events_invalidate_only_the_affected_responses():
+    with serving(tickets_per_space=5) as server:
+        assembla = get_api()
+        space = assembla.spaces()[0]
+        space.tickets()
+        space.milestones()
+        space.tickets()[0].comments()
+        requests = server.requests
+
+        assembla.invalidate_event({'space_id': space['id'], 'object': 'Ticket'})
+        space.tickets()
+        space.tickets()[0].comments()
+        space.milestones()
+        # The tickets and comments were fetched again, but not the milestones
+        assert server.requests - requests == 2
+
+        # Unknown kinds of object invalidate the whole space
+        assembla.invalidate_event({'space_id': space['id'], 'object': 'Document'})
+        space.milestones()
+        assert server.requests - requests == 3
+
+def test_invalidator_follows_the_stream():
+    with serving(tickets_per_space=5) as server:
+        assembla = get_api()
+        space = assembla.spaces()[0]
+        server.add_event('2014-01-19T09:20:05Z', space_id=space['id'], object_id=1)
+        invalidator = CacheInvalidator(assembla, min_interval=0.01, max_interval=0.05)
+        invalidator.start()
+        try:
+            wait_for(lambda: invalidator.stats['events'] == 1)
+            space.tickets()
+            assert invalidator.stats['invalidated'] == 0
+
+            server.add_event('2014-01-19T09:21:00Z', space_id=space['id'], object_id=2)
+            wait_for(lambda: invalidator.stats['events'] == 2)
+            # The cached page of tickets was removed
+            assert invalidator.stats['invalidated'] == 1
+            assert invalidator.cursor == '2014-01-19T09:21:00Z'
+        finally:
+            invalidator.stop()
+
+def test_invalidator_resumes_within_the_second_of_the_last_event():
+    with serving(tickets_per_space=5) as server:
+        assembla = get_api()
+        space = assembla.spaces()[0]
+        server.add_event('2014-01-19T09:20:05Z', space_id=space['id'], object_id=1)
+        invalidator = CacheInvalidator(assembla, min_interval=0.01, max_interval=0.05)
+        invalidator.start()
+        try:
+            wait_for(lambda: invalidator.stats['events'] == 1)
+            route = server.route
+            # Fail the polls of the activity stream, which restarts it
+            server.route = lambda path: None if 'activity' in path else route(path)
+            wait_for(lambda: invalidator.stats['errors'] > 0)
+            space.tickets()
+            server.add_event('2014-01-19T09:20:05Z', space_id=space['id'], object_id=2)
+            server.route = route
+
+            wait_for(lambda: invalidator.stats['events'] == 2)
+            assert invalidator.stats['invalidated'] == 1
+            time.sleep(0.1)
+            # The first event was not processed again
+            assert invalidator.stats['events'] == 2
+        finally:
+            invalidator.stop()
@@ -0,0 +1,157 @@
+import pickle
+from assembla import Ticket
+from assembla.lib import AssemblaCollection, CompactData
+
+
+def build_collection():
+    return AssemblaCollection(
+        Ticket({'number': i, 'status': ('New', 'Fixed')[i % 2], 'milestone_id': i % 3, 'custom_fields': {}})
+        for i in xrange(30)
+    )
+
+def test_collection_behaves_like_a_list():
+    tickets = build_collection()
+    assert len(tickets) == 30
+    assert tickets[0]['number'] == 0
+    assert tickets[-1]['number'] == 29
+    assert isinstance(tickets[:5], AssemblaCollection)
+    assert [t['number'] for t in tickets[:5]] == [0, 1, 2, 3, 4]
+    assert tickets == list(tickets)
+    assert len([] + tickets) == 30
+
+def test_collection_filter():
+    tickets = build_collection()
+    new_tickets = tickets.filter(status='New', milestone_id=0)
+    assert [t['number'] for t in new_tickets] == [0, 6, 12, 18, 24]
+    assert tickets.filter(status='Invalid') == []
+
+def test_collection_filter_builds_indexes_lazily():
+    tickets = build_collection()
+    assert not tickets.indexes
+    tickets.filter(status='New')
+    assert 'status' in tickets.indexes
+    assert len(tickets.indexes['status']['New']) == 15
+
+def test_collection_filter_on_unhashable_values():
+    tickets = build_collection()
+    assert len(tickets.filter(custom_fields={})) == 30
+    assert tickets.indexes['custom_fields'] is None
+
+def test_compact_data_behaves_like_a_dict():
+    data = CompactData({'number': 1, 'status': 'New'})
+    assert data['number'] == 1
+    assert data.get('summary') is None
+    assert data == {'number': 1, 'status': 'New'}
+    data['status'] = 'Fixed'
+    data['summary'] = 'A ticket'
+    del data['number']
+    assert dict(data) == {'status': 'Fixed', 'summary': 'A ticket'}
+    assert 'number' not in data
+
+def test_compact_data_shares_schemas():
+    first = CompactData({'number': 1, 'status': 'New'})
+    second = CompactData({'number': 2, 'status': 'Fixed'})
+    assert first.schema is second.schema
+
+def test_objects_do_not_share_default_data():
+    first, second = Ticket(), Ticket()
+    first['summary'] = 'A ticket'
+    assert 'summary' not in second
+
+def test_objects_copy_shared_data_on_write():
+    data = {'number': 1, 'status': 'New'}
+    first, second = Ticket(data), Ticket(data)
+    first['status'] = 'Fixed'
+    assert data['status'] == 'New'
+    assert second['status'] == 'New'
+
+def test_objects_track_changed_fields():
+    ticket = Ticket({'number': 1, 'status': 'New', 'summary': 'A ticket'})
+    # Objects which were not retrieved from Assembla are entirely new
+    assert ticket.changes() == {'number': 1, 'status': 'New', 'summary': 'A ticket'}
+    ticket.mark_clean()
+    assert ticket.changes() == {}
+    ticket['status'] = 'Fixed'
+    assert ticket.changes() == {'status': 'Fixed'}
+    ticket.data['summary'] = 'Renamed'
+    assert ticket.dirty == set(['number', 'status', 'summary'])
+
+def test_compact_objects_copy_on_write():
+    data = CompactData({'number': 1, 'status': 'New'})
+    first, second = Ticket(data), Ticket(data)
+    first.mark_clean()
+    first['status'] = 'Fixed'
+    assert second['status'] == 'New'
+    assert first.changes() == {'status': 'Fixed'}
+
+def test_objects_track_nested_changes():
+    data = {'number': 1, 'custom_fields': {'Team': 'Web'}, 'tags': ['a']}
+    first, second = Ticket(data), Ticket(data)
+    first.mark_clean()
+    first['custom_fields']['Team'] = 'Core'
+    first.get('tags').append('b')
+    # The shared data is left untouched
+    assert data == {'number': 1, 'custom_fields': {'Team': 'Web'}, 'tags': ['a']}
+    assert second['custom_fields'] == {'Team': 'Web'}
+    assert first.changes() == {'custom_fields': {'Team': 'Core'}, 'tags': ['a', 'b']}
+    first.mark_clean()
+    assert first.changes() == {}
+    first['custom_fields']['Team'] = 'Ops'
+    assert first.changes() == {'custom_fields': {'Team': 'Ops'}}
+
+def test_lazy_collection_instantiates_objects_on_access():
+    built = []
+    def build(record):
+        built.append(record['number'])
+        return Ticket(record)
+    records = [{'number': i, 'status': ('New', 'Fixed')[i % 2]} for i in xrange(10)]
+    tickets = AssemblaCollection.lazy(records, build)
+    assert len(tickets) == 10
+    fixed = tickets.filter(status='Fixed')[1:3]
+    assert built == []
+    assert [t['number'] for t in fixed] == [3, 5]
+    assert built == [3, 5]
+    # Instances are reused by later accesses, including through slices
+    assert tickets[3] is fixed[0]
+    assert tickets[-1]['number'] == 9
+    assert built == [3, 5, 9]
+
+def test_lazy_collection_filters_modified_objects():
+    records = [{'number': i, 'status': 'New'} for i in xrange(3)]
+    tickets = AssemblaCollection.lazy(records, Ticket)
+    tickets[1]['status'] = 'Fixed'
+    assert [t['number'] for t in tickets.filter(status='Fixed')] == [1]
+    assert records[1]['status'] == 'New'
+
+def test_collection_indexes_follow_modified_objects():
+    for tickets in (
+        AssemblaCollection(Ticket({'number': i, 'status': 'New'}) for i in xrange(3)),
+        AssemblaCollection.lazy([{'number': i, 'status': 'New'} for i in xrange(3)], Ticket),
+    ):
+        assert len(tickets.filter(status='New')) == 3
+        tickets[1]['status'] = 'Fixed'
+        assert [t['number'] for t in tickets.filter(status='Fixed')] == [1]
+        assert [t['number'] for t in tickets.filter(status='New')] == [0, 2]
+
+def test_collection_indexes_are_only_discarded_for_the_modified_field():
+    tickets = AssemblaCollection(Ticket({'number': i, 'status': 'New', 'priority': i % 2}) for i in xrange(4))
+    tickets.filter(status='New', priority=1)
+    tickets.index('priority')
+    others = AssemblaCollection([Ticket({'number': 9, 'status': 'New'})])
+    others.filter(status='New')
+
+    tickets[1]['status'] = 'Fixed'
+    assert sorted(tickets.indexes) == ['priority']
+    assert sorted(others.indexes) == ['status']
+    assert [t['number'] for t in tickets.filter(status='Fixed', priority=1)] == [1]
+
+    # Objects of a filtered collection keep their own collection informed
+    fixed = tickets.filter(priority=1)
+    assert [t['number'] for t in fixed.filter(status='New')] == [3]
+    fixed[1]['status'] = 'Fixed'
+    assert [t['number'] for t in fixed.filter(status='Fixed')] == [1, 3]
+
+    copied = pickle.loads(pickle.dumps(tickets))
+    assert [t['number'] for t in copied.filter(status='Fixed')] == [1, 3]
+    copied[0]['status'] = 'Fixed'
+    assert [t['number'] for t in copied.filter(status='Fixed')] == [0, 1, 3]
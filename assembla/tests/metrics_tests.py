@@ -0,0 +1,50 @@
+from assembla import API, APIError
+from assembla.metrics import Histogram, MetricsCollector, endpoint_name
+from assembla.tests.fake_server import serving
+
+
+def test_endpoint_names_replace_ids():
+    assert endpoint_name('GET', 'https://api.assembla.com/v1/spaces.json?page=1') == 'GET spaces'
+    assert (
+        endpoint_name('PUT', 'https://api.assembla.com/v1/spaces/my-space/tickets/12.json') ==
+        'PUT spaces/:space/tickets/:id'
+    )
+    assert endpoint_name('GET', 'spaces/abc/milestones/all') == 'GET spaces/:space/milestones/all'
+
+def test_histogram():
+    histogram = Histogram((1, 5, 10))
+    for value in (0.5, 2, 3, 4, 20):
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot['count'] == 5
+    assert snapshot['buckets'] == {'1': 1, '5': 3, '10': 0, '+Inf': 1}
+    assert snapshot['p50'] == 5
+    assert snapshot['p99'] == 20
+
+def test_collector_records_requests():
+    with serving(tickets_per_space=150):
+        api = API(key='key', secret='secret')
+        api.cache_responses = True
+        metrics = MetricsCollector()
+        metrics.install(api)
+        sent = []
+        api.before_request.append(lambda method, url: sent.append(method))
+
+        space = api.spaces()[0]
+        space.tickets()
+        space.tickets()
+        try:
+            space.wiki_pages()
+        except APIError:
+            pass
+
+        snapshot = metrics.snapshot()
+        tickets = snapshot['endpoints']['GET spaces/:space/tickets']
+        assert tickets['requests'] == 2
+        assert tickets['latency']['count'] == 2
+        assert tickets['bytes_received'] > 0
+        assert tickets['pages']['sum'] == 4
+        assert snapshot['endpoints']['GET spaces/:space/wiki_pages']['errors'] == 1
+        assert snapshot['totals']['requests'] == len(sent) == 4
+        assert snapshot['cache']['hits'] == 2
+        assert snapshot['cache']['hit_ratio'] == 2.0 / 6
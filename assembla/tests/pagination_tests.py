@@ -0,0 +1,79 @@
+from assembla import API, Ticket
+from assembla.tests.fake_server import serving
+
+
+def get_space():
+    return API(key='key', secret='secret').spaces()[0]
+
+def test_iter_tickets_stops_on_a_short_page():
+    with serving(tickets_per_space=250) as server:
+        space = get_space()
+        requests = server.requests
+        numbers = [ticket['number'] for ticket in space.iter_tickets()]
+        assert numbers == list(range(1, 251))
+        assert server.requests - requests == 3
+
+def test_iter_tickets_stops_on_an_empty_page():
+    with serving(tickets_per_space=200) as server:
+        space = get_space()
+        requests = server.requests
+        assert len(list(space.iter_tickets())) == 200
+        # The third page is answered with 204 No Content
+        assert server.requests - requests == 3
+
+def test_iter_json_does_not_mutate_extra_params():
+    with serving(tickets_per_space=250):
+        space = get_space()
+        params = {'per_page': 100, 'report': 0}
+        tickets = list(space.api.iter_json(
+            Ticket,
+            space=space,
+            rel_path=space._build_rel_path('tickets'),
+            extra_params=params,
+            get_all=True,
+        ))
+        assert len(tickets) == 250
+        assert params == {'per_page': 100, 'report': 0}
+
+        params = {'sort_by': 'number'}
+        assert len(list(space.iter_tickets(extra_params=params))) == 250
+        assert params == {'sort_by': 'number'}
+
+def test_iter_tickets_stops_fetching_once_closed():
+    with serving(tickets_per_space=250) as server:
+        space = get_space()
+        requests = server.requests
+        tickets = space.iter_tickets()
+        assert next(tickets)['number'] == 1
+        tickets.close()
+        assert server.requests - requests == 1
+
+def test_iter_comments():
+    with serving(tickets_per_space=1, comments_per_ticket=3) as server:
+        ticket = get_space().tickets()[0]
+        requests = server.requests
+        comments = ticket.iter_comments()
+        assert [comment['comment'] for comment in comments] == [
+            'Comment #{0} on ticket #1'.format(number) for number in (1, 2, 3)
+        ]
+        assert server.requests - requests == 1
+
+def test_concurrent_pages_are_yielded_in_order():
+    with serving(tickets_per_space=1000, latency=0.01) as server:
+        space = get_space()
+        space.api.page_workers = 4
+        requests = server.requests
+        numbers = [ticket['number'] for ticket in space.tickets()]
+        assert numbers == list(range(1, 1001))
+        # The first page, then windows of pages 2-5, 6-9 and 10-13. Page 11 is empty
+        assert server.requests - requests == 13
+
+def test_concurrent_pages_stop_at_a_short_page_within_a_window():
+    with serving(tickets_per_space=250) as server:
+        space = get_space()
+        space.api.page_workers = 4
+        requests = server.requests
+        numbers = [ticket['number'] for ticket in space.iter_tickets()]
+        assert numbers == list(range(1, 251))
+        # The first page, then pages 2 to 5, of which page 3 is short
+        assert server.requests - requests == 5
@@ -0,0 +1,82 @@
+from assembla import API, settings
+from assembla.tests.fake_server import serving
+
+
+def get_space():
+    return API(key='key', secret='secret').spaces()[0]
+
+def test_milestone_tickets_are_queried_server_side():
+    with serving(tickets_per_space=20) as server:
+        milestone = get_space().milestones()[1]
+        requests = server.requests
+        tickets = milestone.tickets()
+        assert [ticket['number'] for ticket in tickets] == [2, 7, 12, 17]
+        assert server.requests - requests == 1
+        assert [ticket['number'] for ticket in milestone.tickets(status='Fixed')] == [2]
+
+def test_milestone_tickets_fall_back_to_filtering_the_space():
+    with serving(tickets_per_space=20) as server:
+        route = server.route
+        # Answer the milestone's ticket listing with 404 Not Found
+        server.route = lambda path: None if '/tickets/milestone/' in path else route(path)
+        milestone = get_space().milestones()[1]
+        assert [ticket['number'] for ticket in milestone.tickets()] == [2, 7, 12, 17]
+
+def test_user_tickets_are_fetched_from_every_space():
+    with serving(spaces=3, tickets_per_space=14):
+        user = get_space().users()[3]
+        tickets = user.tickets()
+        assert sorted((ticket['space_id'], ticket['number']) for ticket in tickets) == [
+            (space_id, number)
+            for space_id in ('space-0', 'space-1', 'space-2')
+            for number in (3, 10)
+        ]
+        assert all(ticket.space['id'] == ticket['space_id'] for ticket in tickets)
+
+def test_ticket_relations_are_looked_up_once_per_space():
+    with serving(tickets_per_space=20) as server:
+        space = get_space()
+        tickets = space.tickets()
+        requests = server.requests
+        for ticket in tickets:
+            milestone = ticket.milestone()
+            assert (milestone and milestone['id']) == ticket['milestone_id']
+            assert ticket.user()['id'] == ticket['assigned_to_id']
+        # One listing of milestones and one of users
+        assert server.requests - requests == 2
+
+        space = get_space()
+        tickets = space.prefetch_related(space.tickets(), relations=['user'])
+        requests = server.requests
+        assert [ticket.user()['id'] for ticket in tickets][:3] == ['user-1', 'user-2', 'user-3']
+        assert server.requests == requests
+
+def test_lookup_refetches_missing_and_expired_listings():
+    with serving(tickets_per_space=20) as server:
+        space = get_space()
+        ticket = space.tickets()[0]
+        assert ticket.user()['id'] == 'user-1'
+
+        server.users['space-0'].append({'id': 'user-new', 'login': 'new', 'name': 'New User'})
+        ticket['assigned_to_id'] = 'user-new'
+        requests = server.requests
+        assert ticket.user()['name'] == 'New User'
+        assert server.requests - requests == 1
+        assert ticket.user()['name'] == 'New User'
+        assert server.requests - requests == 1
+
+        ticket['assigned_to_id'] = 'user-missing'
+        assert ticket.user() is None
+        assert server.requests - requests == 2
+
+        ttl = settings.LOOKUP_TABLE_TTL
+        # Listings fetched from now on expire immediately
+        settings.LOOKUP_TABLE_TTL = 0
+        try:
+            server.users['space-0'][0]['name'] = 'Renamed'
+            space.clear_lookup_tables()
+            assert space.lookup('users', 'user-0')['name'] == 'Renamed'
+            server.users['space-0'][0]['name'] = 'Renamed again'
+            assert space.lookup('users', 'user-0')['name'] == 'Renamed again'
+        finally:
+            settings.LOOKUP_TABLE_TTL = ttl
@@ -0,0 +1,58 @@
+from assembla import API
+from assembla.replica import Replica
+from assembla.tests.fake_server import serving
+
+
+def get_space():
+    return API(key='key', secret='secret').spaces()[0]
+
+def test_replica_syncs_every_resource():
+    with serving(tickets_per_space=40):
+        space = get_space()
+        replica = Replica(':memory:')
+        counts = replica.sync(space)
+        assert counts == {'tickets': 40, 'milestones': 4, 'components': 0, 'users': 7, 'tags': 0}
+        assert replica.watermark(space['id']) == '2014-01-02T00:00:00Z'
+        assert replica.sync(space) == {'tickets': 0, 'milestones': 0, 'components': 0, 'users': 0, 'tags': 0}
+
+def test_replica_syncs_changes_incrementally():
+    with serving(tickets_per_space=40) as server:
+        space = get_space()
+        replica = Replica(':memory:')
+        replica.sync(space)
+        ticket = server.tickets[space['id']][4]
+        ticket.update(status='Fixed', updated_at='2014-02-01T00:00:00Z')
+        server.milestones[space['id']].pop()
+
+        requests = server.requests
+        assert replica.sync(space, ['tickets', 'milestones']) == {'tickets': 1, 'milestones': 1}
+        # One page of tickets, then the milestones
+        assert server.requests - requests == 2
+        assert replica.query('tickets', number=ticket['number'])[0]['status'] == 'Fixed'
+        assert replica.count('milestones') == 3
+
+def test_replica_queries():
+    with serving(tickets_per_space=40):
+        space = get_space()
+        replica = Replica(':memory:')
+        replica.sync(space, ['tickets'])
+        tickets = replica.query('tickets', space=space, status='Fixed', priority__gte=3, order_by='-number', limit=3)
+        assert [ticket['number'] for ticket in tickets] == [38, 34, 22]
+        assert [ticket['number'] for ticket in replica.query('tickets', milestone_id=None, number__lt=20)] == [5, 10, 15]
+        assert len(replica.query('tickets', status__in=['New', 'Accepted'])) == 20
+        assert len(replica.query('tickets', status__ne='New')) == 30
+        # Fields that no object has behave as if they were None
+        assert len(replica.query('tickets', unknown=None)) == 40
+        assert len(replica.query('tickets', unknown=1)) == 0
+        assert replica.query('tickets', number=1)[0]['custom_fields'] == {}
+
+def test_replica_aggregates():
+    with serving(tickets_per_space=40):
+        space = get_space()
+        replica = Replica(':memory:')
+        replica.sync(space, ['tickets'])
+        assert replica.count('tickets') == 40
+        assert replica.count('tickets', by='status') == {'New': 10, 'Accepted': 10, 'Fixed': 10, 'Invalid': 10}
+        assert replica.count('tickets', by=('status', 'state'), status='New') == {('New', 0): 10}
+        assert replica.total('tickets', 'estimate', by='milestone_id')[None] == 8.0
+        assert replica.total('tickets', 'estimate', space='another-space') == 0
@@ -1,5 +1,6 @@
 import unittest
 from assembla import API
+from assembla.sync import TicketStore
 from assembla.tests.auth import auth
 import datetime
 import time
@@ -141,6 +142,15 @@ class TestAssembla(unittest.TestCase):
             'numbers of tickets to trigger pagination'
         )
 
+    def test_space_sync_tickets(self):
+        space = self.__space_with_tickets()
+        store = TicketStore()
+        tickets = space.sync_tickets(store)
+        self.assertEqual(len(tickets), len(space.tickets()))
+        self.assertIsNotNone(store.watermark(space['id']))
+        # Nothing has changed since the last sync
+        self.assertEqual(space.sync_tickets(store), [])
+
     def test_space_milestones(self):
         milestone = self.__milestone_with_tickets()
         for key in (
@@ -177,6 +187,13 @@ class TestAssembla(unittest.TestCase):
         self.assertIsNotNone(ticket.space)
         self.assertEqual(ticket.api, self.assembla)
 
+    def test_space_prefetch_related(self):
+        milestone = self.__milestone_with_tickets()
+        tickets = milestone.space.prefetch_related(milestone.tickets())
+        for ticket in tickets:
+            self.assertEqual(ticket.related['milestone']['id'], milestone['id'])
+            self.assertEqual(ticket.milestone()['id'], milestone['id'])
+
     def test_user_tickets(self):
         for space in self.assembla.spaces():
             for user in space.users():
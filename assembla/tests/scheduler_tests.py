@@ -0,0 +1,62 @@
+import time
+from assembla.scheduler import RequestScheduler
+
+
+class Response(object):
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def responder(*status_codes):
+    """
+    Returns a function which responds with each of `status_codes` in turn
+    """
+    responses = [Response(status_code) for status_code in status_codes]
+    return lambda: responses.pop(0)
+
+def test_scheduler_returns_successful_responses():
+    scheduler = RequestScheduler()
+    assert scheduler.request(responder(200)).status_code == 200
+    assert scheduler.stats['retries'] == 0
+
+def test_scheduler_retries_with_backoff():
+    scheduler = RequestScheduler(backoff=0.001)
+    assert scheduler.request(responder(503, 502, 200)).status_code == 200
+    assert scheduler.stats['retries'] == 2
+    assert scheduler.stats['throttled'] == 1
+
+def test_scheduler_gives_up_after_max_retries():
+    scheduler = RequestScheduler(max_retries=1, backoff=0.001)
+    assert scheduler.request(responder(500, 500, 200)).status_code == 500
+
+def test_scheduler_only_retries_non_idempotent_requests_after_429():
+    scheduler = RequestScheduler(backoff=0.001)
+    assert scheduler.request(responder(503, 200), idempotent=False).status_code == 503
+    assert scheduler.request(responder(429, 201), idempotent=False).status_code == 201
+
+def test_scheduler_honors_retry_after():
+    scheduler = RequestScheduler()
+    responses = [Response(429, {'Retry-After': '0.05'}), Response(200)]
+    start = time.time()
+    scheduler.request(lambda: responses.pop(0))
+    assert time.time() - start >= 0.05
+
+def test_scheduler_halves_concurrency_when_throttled():
+    scheduler = RequestScheduler(max_concurrency=8, backoff=0.001)
+    scheduler.request(responder(429, 429, 200))
+    assert 2 <= scheduler.concurrency < 3
+
+def test_scheduler_rate_limit():
+    scheduler = RequestScheduler(rate=100, burst=1)
+    start = time.time()
+    for i in range(6):
+        scheduler.request(responder(200))
+    assert time.time() - start >= 0.05
+
+def test_scheduler_fractional_rate():
+    scheduler = RequestScheduler(rate=0.5)
+    start = time.time()
+    # The first request uses the single token in the bucket
+    assert scheduler.request(responder(200)).status_code == 200
+    assert time.time() - start < 1
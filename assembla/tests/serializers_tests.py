@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from assembla import API
+from assembla.serializers import SERIALIZERS, JSONSerializer, get_serializer
+
+
+def test_serializers_round_trip():
+    ticket = {'number': 1, 'summary': u'Ticket ñ', 'custom_fields': {}, 'estimate': 1.5, 'completed_date': None}
+    for name, serializer in SERIALIZERS.items():
+        try:
+            serializer = serializer()
+        except ImportError:  # The library is not installed
+            continue
+        content = serializer.dumps([ticket])
+        if not isinstance(content, bytes):
+            content = content.encode('utf-8')
+        assert serializer.loads(content) == [ticket], name
+
+def test_get_serializer_respects_preference():
+    assert get_serializer(['json']).name == 'json'
+    assert get_serializer().name in SERIALIZERS
+
+def test_api_uses_the_given_serializer():
+    serializer = JSONSerializer()
+    assert API(key='key', secret='secret', serializer=serializer).serializer is serializer
+
+def test_serializers_are_named_after_their_library():
+    for name, serializer in SERIALIZERS.items():
+        try:
+            assert serializer().name == name
+        except ImportError:
+            continue
@@ -0,0 +1,51 @@
+import threading
+import time
+from assembla import API
+from assembla.tests.fake_server import serving
+
+
+def take(iterator, count):
+    return [next(iterator) for _ in xrange(count)]
+
+def test_stream_follow_yields_each_event_once_in_order():
+    with serving(spaces=1, tickets_per_space=0) as server:
+        assembla = API(key='key', secret='secret')
+        server.add_event('2014-01-19T09:20:05Z', object_id=1)
+        server.add_event('2014-01-19T09:20:10Z', object_id=2)
+        events = assembla.stream_follow(min_interval=0.01, max_interval=0.05)
+        assert [event['object_id'] for event in take(events, 2)] == [1, 2]
+
+        # Within the same minute as the events already seen, which
+        # Assembla returns again
+        server.add_event('2014-01-19T09:20:30Z', object_id=3)
+        server.add_event('2014-01-19T09:22:00Z', object_id=4)
+        assert [event['object_id'] for event in take(events, 2)] == [3, 4]
+
+def test_stream_follow_starts_from_since():
+    with serving(spaces=1, tickets_per_space=0) as server:
+        assembla = API(key='key', secret='secret')
+        server.add_event('2014-01-19T09:20:05Z', object_id=1)
+        server.add_event('2014-01-19T09:25:00Z', object_id=2)
+        server.add_event('2014-01-19T09:25:00Z', object_id=3)
+        processed = [event.key for event in assembla.stream() if event['object_id'] == 2]
+        events = assembla.stream_follow(since='2014-01-19T09:25:00Z', processed=processed, min_interval=0.01)
+        # Events dated `since` which were not processed are still yielded
+        assert next(events)['object_id'] == 3
+
+def test_stream_follow_backs_off_while_idle():
+    with serving(spaces=1, tickets_per_space=0) as server:
+        assembla = API(key='key', secret='secret')
+        server.add_event('2014-01-19T09:20:05Z', object_id=1)
+        events = assembla.stream_follow(min_interval=0.01, max_interval=0.04)
+        next(events)
+
+        def add_later():
+            time.sleep(0.3)
+            server.add_event('2014-01-19T09:21:00Z', object_id=2)
+        thread = threading.Thread(target=add_later)
+        thread.start()
+        requests = server.requests
+        assert next(events)['object_id'] == 2
+        thread.join()
+        # Without backing off, polling every 0.01s would take around 30 requests
+        assert server.requests - requests < 15
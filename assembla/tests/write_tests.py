@@ -52,6 +52,23 @@ class TestAssembla(unittest.TestCase):
         # tidy up (oh and test delete)
         ticket.delete()
 
+    def test_bulk_write_and_delete(self):
+        space = self.__space_with_tickets()
+        tickets = [
+            Ticket({'summary': 'Bulk ticket #{0}'.format(i)})
+            for i in range(5)
+        ]
+
+        result = space.write_tickets(tickets, concurrency=2)
+        self.assertEqual(len(result.successes), 5)
+        self.assertEqual(result.failures, [])
+        for ticket in result.instances:
+            self.assertTrue(ticket['number'])
+
+        result = space.delete_tickets(result.instances, concurrency=2)
+        self.assertEqual(len(result.successes), 5)
+        self.assertEqual(result.failures, [])
+
     def _get_space_with_wiki_tools(self):
         for space in self.assembla.spaces():
             for tool in space.tools():
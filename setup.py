@@ -36,6 +36,10 @@ setup(
     install_requires = [
         'requests',
     ],
+    extras_require = {
+        'async': ['aiohttp'],
+        'zstd': ['zstandard'],
+    },
     package_data = {'assembla': []},
     entry_points = {},
 